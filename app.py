@@ -2,10 +2,11 @@
 import os
 import json
 import time
-import threading
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, stream_with_context, g, make_response, abort
+from flask.cli import AppGroup
+import click
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, TextAreaField, SelectField, IntegerField, DecimalField, PasswordField, SubmitField
@@ -15,11 +16,32 @@ from werkzeug.utils import secure_filename
 from flask_mail import Mail, Message
 from flask_bcrypt import Bcrypt
 from bson import ObjectId
-from pymongo import MongoClient
+from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
 from dotenv import load_dotenv
+from config import config_by_name
 import secrets
-from functools import wraps
+from functools import wraps, partial
 from functools import lru_cache
+from utils.category_counts import CategoryCounts
+from utils.enquiry_trend import EnquiryTrend
+from utils.pagination import keyset_page, rank_page, count_total
+from utils.cache import TTLCache
+from utils.coherence import CacheCoherence
+from utils.stats_counters import StatsCounters
+from utils.events import Broadcaster, format_sse
+from utils.email_sender import EmailQueue
+from utils.file_upload import UploadStore
+from utils.images import ImagePipeline, product_picture, remove_variants
+from utils.search import SearchIndex, shadow_fields, admin_search_filter
+from utils.autocomplete import Autocomplete
+from utils.http_cache import DEFAULT_POLICIES, cache_policy, conditional, policy_for, build_id
+from utils.page_cache import PageCache
+from utils.fragment_cache import FragmentCache, FragmentCacheExtension, server_timing
+from utils.assets import AssetManifest, build_assets
+from utils.db import MongoConnection, ensure_indexes
+from utils.passwords import PasswordHasher, LoginOverloaded
+from utils.export import FORMATS as EXPORT_FORMATS, ENQUIRY_FIELDS, PRODUCT_FIELDS, export_query, stream_export
+from utils.activity_log import ActivitySink, ensure_retention, activity_filter, ACTIONS as ACTIVITY_ACTIONS
 
 
 # Load environment variables
@@ -31,9 +53,24 @@ app = Flask(__name__)
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', secrets.token_hex(32))
 app.config['MONGO_URI'] = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/mumbai_tech')
+app.config['MONGO_DBNAME'] = os.getenv('MONGODB_DBNAME', 'mumbai_tech')
+app.config['MONGO_TLS'] = os.getenv('MONGO_TLS', 'True') == 'True'
+app.config['MONGO_RETRY_WRITES'] = True
+app.config['MONGO_WRITE_CONCERN'] = 'majority'
+app.config['MONGO_MAX_POOL_SIZE'] = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+app.config['MONGO_MIN_POOL_SIZE'] = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+app.config['MONGO_SERVER_SELECTION_TIMEOUT_MS'] = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000))
+# Per-handle routing, e.g. MONGO_CATALOG_READ_PREFERENCE=secondaryPreferred
+app.config['MONGO_READ_PREFERENCES'] = {'catalog': os.getenv('MONGO_CATALOG_READ_PREFERENCE', 'primary')}
+app.config['MONGO_WRITE_CONCERNS'] = {'enquiries': 'majority'}
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+app.config['IMAGE_WORKERS'] = int(os.getenv('IMAGE_WORKERS', 2))  # processes for thumbnails, 0 disables
+
+# Pagination
+app.config['PRODUCTS_PER_PAGE'] = 20
+app.config['ENQUIRIES_PER_PAGE'] = 15
 
 # Email configuration
 app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
@@ -43,7 +80,92 @@ app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@mumbai-tech.com')
 
+# Outbound email queue (jobs persisted in Mongo, sent by a bounded worker pool)
+app.config['MAIL_QUEUE_WORKERS'] = int(os.getenv('MAIL_QUEUE_WORKERS', 2))
+app.config['MAIL_QUEUE_BATCH_SIZE'] = int(os.getenv('MAIL_QUEUE_BATCH_SIZE', 20))
+app.config['MAIL_QUEUE_MAX_ATTEMPTS'] = int(os.getenv('MAIL_QUEUE_MAX_ATTEMPTS', 5))
+app.config['MAIL_QUEUE_BACKOFF'] = int(os.getenv('MAIL_QUEUE_BACKOFF', 30))  # seconds, doubled per retry
+
+# Dashboard enquiry trend
+app.config['ENQUIRY_TREND_WINDOW'] = int(os.getenv('ENQUIRY_TREND_WINDOW', 30))
+app.config['ENQUIRY_TREND_UNIT'] = os.getenv('ENQUIRY_TREND_UNIT', 'day')  # 'day' or 'week'
+
+# Cross-worker cache coherence: 'auto' (change streams, else polling), 'stream', 'poll' or 'off'
+app.config['CACHE_COHERENCE'] = os.getenv('CACHE_COHERENCE', 'auto')
+app.config['CACHE_VERSION_CHECK_INTERVAL'] = float(os.getenv('CACHE_VERSION_CHECK_INTERVAL', 2))
+
+# Materialized stats counters are recomputed this often (seconds, 0 disables)
+app.config['STATS_RECONCILE_INTERVAL'] = int(os.getenv('STATS_RECONCILE_INTERVAL', 3600))
+
+# HTTP caching: Cache-Control per policy name, ETags tied to the catalog version
+app.config['CACHE_POLICIES'] = dict(DEFAULT_POLICIES,
+                                    catalog=f"public, max-age={int(os.getenv('CATALOG_MAX_AGE', 3600))}")
+app.config['BUILD_ID'] = os.getenv('BUILD_ID') or build_id(
+    os.path.join(app.root_path, 'templates'),
+    os.path.join(app.root_path, 'static', 'css'),
+    os.path.join(app.root_path, 'static', 'js'))
+
+# Fingerprinted static assets from `flask build-assets` (falls back to sources when absent)
+app.config['ASSET_MANIFEST'] = os.getenv('ASSET_MANIFEST', 'True').lower() == 'true'
+
+# Rendered-page cache for anonymous visitors
+app.config['PAGE_CACHE_SIZE'] = int(os.getenv('PAGE_CACHE_SIZE', 256))
+app.config['PAGE_CACHE_TTL'] = int(os.getenv('PAGE_CACHE_TTL', 600))
+
+# Logged-in admin users, so load_user() doesn't hit Mongo on every request
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 256))
+app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 60))
+
+# Activity log writes are buffered and flushed in batches off the request path
+app.config['ACTIVITY_LOG_BUFFER'] = int(os.getenv('ACTIVITY_LOG_BUFFER', 10000))
+app.config['ACTIVITY_LOG_BATCH_SIZE'] = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', 200))
+app.config['ACTIVITY_LOG_FLUSH_INTERVAL'] = float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', 2))
+# Retention, applied by `flask db ensure-indexes`: 'none' (keep everything), or
+# opt into 'ttl' (delete records older than N days) or 'capped'
+app.config['ACTIVITY_LOG_RETENTION'] = os.getenv('ACTIVITY_LOG_RETENTION', 'none')
+app.config['ACTIVITY_LOG_RETENTION_DAYS'] = int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', 180))
+app.config['ACTIVITY_LOG_CAPPED_MB'] = int(os.getenv('ACTIVITY_LOG_CAPPED_MB', 256))
+app.config['ACTIVITIES_PER_PAGE'] = 50
+
+# Admin CSV/JSONL exports are streamed from the cursor this many documents at a time
+app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', 500))
+app.config['SUPPORTED_LOCALES'] = ['en']
+
+# Rendered template fragments ({% cache %} blocks in the shared layouts)
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.getenv('FRAGMENT_CACHE_SIZE', 128))
+app.config['FRAGMENT_CACHE_TTL'] = int(os.getenv('FRAGMENT_CACHE_TTL', 600))
+
+# Server-Sent Events for the admin enquiry badge. Each open stream holds a
+# worker thread, so it needs threaded or gevent workers (gunicorn.conf.py);
+# with SSE_ENABLED=False the badge polls instead
+app.config['SSE_ENABLED'] = os.getenv('SSE_ENABLED', 'True') == 'True'
+app.config['SSE_MAX_CLIENTS'] = int(os.getenv('SSE_MAX_CLIENTS',
+                                              max(int(os.getenv('GUNICORN_THREADS', 16)) // 2, 1)))
+app.config['SSE_HEARTBEAT'] = int(os.getenv('SSE_HEARTBEAT', 15))
+app.config['SSE_MAX_STREAM_AGE'] = int(os.getenv('SSE_MAX_STREAM_AGE', 600))
+
+# Password hashing (stored hashes are upgraded on login when the cost changes)
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', 12))
+app.config['LOGIN_VERIFY_WORKERS'] = int(os.getenv('LOGIN_VERIFY_WORKERS', 2))
+app.config['LOGIN_VERIFY_QUEUE'] = int(os.getenv('LOGIN_VERIFY_QUEUE', 16))
+app.config['LOGIN_VERIFY_TIMEOUT'] = int(os.getenv('LOGIN_VERIFY_TIMEOUT', 10))
+
+# A config.py class picked with FLASK_CONFIG ('development', 'production',
+# 'testing') overrides the settings above. It is applied here, before any of
+# the objects below read them. SECRET_KEY keeps the value set above, so an
+# unset SECRET_KEY never falls back to the fixed key in config.py.
+app.config['CONFIG_NAME'] = os.getenv('FLASK_CONFIG') or None
+if app.config['CONFIG_NAME']:
+    if app.config['CONFIG_NAME'] not in config_by_name:
+        raise ValueError(f"Unknown FLASK_CONFIG {app.config['CONFIG_NAME']!r}, "
+                         f"expected one of {', '.join(config_by_name)}")
+    _secret_key = app.config['SECRET_KEY']
+    app.config.from_object(config_by_name[app.config['CONFIG_NAME']])
+    app.config['SECRET_KEY'] = _secret_key
+
 # Initialize extensions
+assets = AssetManifest(app.static_folder, enabled=app.config['ASSET_MANIFEST'])
+assets.init_app(app)
 bcrypt = Bcrypt(app)
 mail = Mail(app)
 login_manager = LoginManager(app)
@@ -51,26 +173,242 @@ login_manager.login_view = 'admin_login'
 login_manager.login_message = 'Please log in to access this page.'
 login_manager.login_message_category = 'info'
 
-# MongoDB connection
-client = MongoClient(app.config['MONGO_URI']
-    ,tls=True,
-    tlsAllowInvalidCertificates=False,
-    retryWrites=True,
-    w='majority')
-db = client.mumbai_tech
+# MongoDB connection (the client is created on first use, not at import)
+mongo = MongoConnection()
+mongo.init_app(app)
 
 # Collections
-products_collection = db.products
-categories_collection = db.categories
-enquiries_collection = db.enquiries
-admin_users_collection = db.admin_users
-activity_logs_collection = db.activity_logs
+products_collection = mongo.collection('products')
+categories_collection = mongo.collection('categories')
+enquiries_collection = mongo.collection('enquiries')
+admin_users_collection = mongo.collection('admin_users')
+activity_logs_collection = mongo.collection('activity_logs')
+cache_versions_collection = mongo.collection('cache_versions')
+stats_collection = mongo.collection('stats')
+email_jobs_collection = mongo.collection('email_jobs')
+upload_refs_collection = mongo.collection('upload_refs')
+
+# Public catalog reads, routed by MONGO_READ_PREFERENCES['catalog']; after a
+# catalog write they go to the primary until secondaries have caught up
+catalog_products = mongo.collection('products', profile='catalog')
+catalog_categories = mongo.collection('categories', profile='catalog')
+
+# Indexes the routes rely on; created by `flask db ensure-indexes`, never at import
+INDEXES = {
+    'products': [
+        IndexModel([('name', TEXT), ('description', TEXT)]),
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('category_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('is_featured', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('search_terms', ASCENDING)])
+    ],
+    'categories': [
+        IndexModel([('name', ASCENDING)], unique=True)
+    ],
+    'enquiries': [
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)])
+    ],
+    'admin_users': [
+        IndexModel([('username', ASCENDING)])
+    ],
+    'activity_logs': [
+        IndexModel([('timestamp', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('user_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)]),
+        IndexModel([('action', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)])
+    ],
+    'email_jobs': [
+        IndexModel([('status', ASCENDING), ('next_attempt_at', ASCENDING)])
+    ],
+    'upload_refs': [
+        IndexModel([('refs', ASCENDING)])
+    ]
+}
+
+db_cli = AppGroup('db', help='Database maintenance commands')
+app.cli.add_command(db_cli)
+
+@db_cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Apply activity log retention, then create any missing indexes in INDEXES (idempotent)"""
+    # Retention first: converting to a capped collection drops its indexes
+    print(ensure_retention(mongo.db, 'activity_logs',
+                           mode=app.config['ACTIVITY_LOG_RETENTION'],
+                           days=app.config['ACTIVITY_LOG_RETENTION_DAYS'],
+                           capped_bytes=app.config['ACTIVITY_LOG_CAPPED_MB'] * 1024 * 1024))
+    report = ensure_indexes(mongo, INDEXES)
+    failed = 0
+    for name, result in report.items():
+        print(f"{name}: {len(result['created'])} created, {len(result['existing'])} already present")
+        for index_name in result['created']:
+            print(f"  + {index_name}")
+        for index_name in result['failed']:
+            print(f"  ! {index_name} (conflicts with an existing index, see log)")
+        failed += len(result['failed'])
+    if failed:
+        raise SystemExit(1)
+
+@db_cli.command('connection-info')
+def connection_info_command():
+    """Show pool settings, per-handle routing and the replica set members seen"""
+    mongo.client.admin.command('ping')
+    print(json.dumps(mongo.describe(), indent=2, default=str))
+
+# Shared per-category product counts (one aggregation, short TTL)
+category_counts = CategoryCounts(catalog_products, ttl=60)
+
+# Catalog read cache (categories, featured products, product documents)
+catalog_cache = TTLCache(maxsize=512, ttl=300)
+
+# Rendered public pages for anonymous visitors
+page_cache = PageCache(TTLCache(maxsize=app.config['PAGE_CACHE_SIZE'], ttl=app.config['PAGE_CACHE_TTL']),
+                       locales=app.config['SUPPORTED_LOCALES'])
+
+# Rendered fragments of the shared layout (the nav categories menu)
+fragment_cache = FragmentCache(TTLCache(maxsize=app.config['FRAGMENT_CACHE_SIZE'],
+                                        ttl=app.config['FRAGMENT_CACHE_TTL']))
+app.jinja_env.add_extension(FragmentCacheExtension)
+app.jinja_env.fragment_cache = fragment_cache
+
+# Version stamps that tell every worker when its caches went stale
+coherence = CacheCoherence(cache_versions_collection,
+                           mode=app.config['CACHE_COHERENCE'],
+                           check_interval=app.config['CACHE_VERSION_CHECK_INTERVAL'])
+# Refill the caches below from the primary, not a secondary still missing the write
+coherence.register('catalog', lambda: mongo.read_primary('catalog'))
+coherence.register('catalog', catalog_cache.clear)
+coherence.register('catalog', category_counts.invalidate)
+coherence.register('catalog', page_cache.clear)
+coherence.register('catalog', lambda: fragment_cache.invalidate_tag('catalog'))
+
+# In-memory product search index (kept in step with product writes; product
+# writes in other workers arrive as a 'products' version change)
+search_index = SearchIndex(products_collection,
+                           version_func=lambda: coherence.version('products'))
+coherence.register('products', search_index.refresh)
+
+# Part-number / name / manufacturer typeahead (rebuilt in the background on writes)
+autocomplete = Autocomplete(products_collection,
+                            version_func=lambda: coherence.version('products'))
+coherence.register('products', autocomplete.refresh)
+
+def catalog_version():
+    """Catalog version stamp for ETags (None when not tracked)"""
+    return coherence.version('catalog')
+
+def catalog_and_stats_version():
+    """Version stamp for pages that also show the dashboard figures"""
+    catalog = catalog_version()
+    if catalog is None:
+        return None
+    return f"{catalog}.{coherence.version('stats')}"
+
+def catalog_conditional(last_modified_func=None, with_stats=False):
+    """304 handling for views whose output only depends on the catalog (and stats)"""
+    return conditional(catalog_and_stats_version if with_stats else catalog_version,
+                       build=app.config['BUILD_ID'],
+                       last_modified_func=last_modified_func)
+
+def search_conditional(index, param='q'):
+    """
+    304 handling for views that answer the `param` query from an in-memory
+    index. The ETag also carries the 'products' version the index snapshot
+    was loaded at, so results served while it is still catching up with a
+    write never share an ETag with the results after it.
+    """
+    def version():
+        catalog = catalog_version()
+        if catalog is None or not request.args.get(param):
+            return catalog
+        if index.version is None:
+            return None
+        return f'{catalog}.{index.version}'
+    return conditional(version, build=app.config['BUILD_ID'])
 
-# Create indexes
-products_collection.create_index([('name', 'text'), ('description', 'text')])
-categories_collection.create_index([('name', 1)], unique=True)
+def search_product_ids(text, limit=None, category_id=None):
+    """Ranked ObjectIds of products matching a free-text search"""
+    return [ObjectId(doc_id) for doc_id, _ in
+            search_index.search(text, limit=limit, category_id=category_id)]
+
+def invalidate_product_cache(product_id=None):
+    """Drop cached catalog entries affected by a product write"""
+    catalog_cache.invalidate_namespace('featured')
+    if product_id:
+        catalog_cache.invalidate(('product', str(product_id)))
+        page_cache.invalidate('product_detail', product_id=str(product_id))
+    for endpoint in ('index', 'categories', 'category_products'):
+        page_cache.invalidate(endpoint)
+    fragment_cache.invalidate_tag('catalog')
+    mongo.read_primary('catalog')
+    coherence.bump('catalog')
+    coherence.bump('products')
+    # After the bump, so the rebuilt snapshots are labelled with the new version
+    search_index.refresh()
+    autocomplete.refresh()
+    stats_changed()
+
+def invalidate_category_cache(category_id=None):
+    """Drop cached catalog entries affected by a category write"""
+    catalog_cache.invalidate_namespace('categories')
+    if category_id:
+        catalog_cache.invalidate(('category', str(category_id)))
+    # Category names appear on most catalog pages
+    page_cache.clear()
+    fragment_cache.invalidate_tag('catalog')
+    mongo.read_primary('catalog')
+    coherence.bump('catalog')
+    stats_changed()
+
+def invalidate_product_images(product_id):
+    """Pick up freshly built image variants wherever the product is shown"""
+    catalog_cache.invalidate_namespace('featured')
+    catalog_cache.invalidate(('product', str(product_id)))
+    page_cache.invalidate('product_detail', product_id=str(product_id))
+    for endpoint in ('index', 'categories', 'category_products'):
+        page_cache.invalidate(endpoint)
+    fragment_cache.invalidate_tag('catalog')
+    mongo.read_primary('catalog')
+    coherence.bump('catalog')
+
+# Content-addressed upload storage
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'], upload_refs_collection,
+                           on_collect=partial(remove_variants, app.config['UPLOAD_FOLDER']))
+
+# Thumbnails and WebP/AVIF variants, built in a process pool after upload
+image_pipeline = ImagePipeline(app.config['UPLOAD_FOLDER'], products_collection,
+                               workers=app.config['IMAGE_WORKERS'],
+                               on_update=invalidate_product_images)
+app.add_template_global(product_picture)
+
+# Durable email queue
+email_queue = EmailQueue(email_jobs_collection, mail, app,
+                         workers=app.config['MAIL_QUEUE_WORKERS'],
+                         batch_size=app.config['MAIL_QUEUE_BATCH_SIZE'],
+                         max_attempts=app.config['MAIL_QUEUE_MAX_ATTEMPTS'],
+                         backoff_seconds=app.config['MAIL_QUEUE_BACKOFF'])
+
+# Buffered activity log writer
+activity_sink = ActivitySink(activity_logs_collection,
+                             max_buffer=app.config['ACTIVITY_LOG_BUFFER'],
+                             batch_size=app.config['ACTIVITY_LOG_BATCH_SIZE'],
+                             flush_interval=app.config['ACTIVITY_LOG_FLUSH_INTERVAL'])
+
+# Login password checks on a bounded bcrypt pool
+password_hasher = PasswordHasher(rounds=app.config['BCRYPT_LOG_ROUNDS'],
+                                 workers=app.config['LOGIN_VERIFY_WORKERS'],
+                                 max_queue=app.config['LOGIN_VERIFY_QUEUE'],
+                                 timeout=app.config['LOGIN_VERIFY_TIMEOUT'])
+
+# Enquiry trend engine (shared with the admin blueprint)
+enquiry_trend = EnquiryTrend(enquiries_collection)
+app.extensions['enquiry_trend'] = enquiry_trend
 
 # ========== STATS CACHE SYSTEM ==========
+# Counters document kept up to date by the write paths
+stats_counters = StatsCounters(stats_collection, products_collection,
+                               categories_collection, enquiries_collection)
+app.extensions['stats_counters'] = stats_counters
+
 _stats_cache = None
 _stats_cache_time = 0
 CACHE_DURATION = 300  # 5 minutes in seconds
@@ -90,12 +428,13 @@ def get_admin_stats(force_refresh=False):
         return _stats_cache
     
     try:
-        # Fetch fresh stats from database
+        # Fetch fresh stats from the counters document
+        counters = stats_counters.read()
         stats = {
-            'total_products': products_collection.count_documents({}),
-            'total_categories': categories_collection.count_documents({}),
-            'new_enquiries': enquiries_collection.count_documents({'status': 'new'}),
-            'total_enquiries': enquiries_collection.count_documents({}),
+            'total_products': counters['total_products'],
+            'total_categories': counters['total_categories'],
+            'new_enquiries': counters['new_enquiries'],
+            'total_enquiries': counters['total_enquiries'],
             'cached_at': current_time,
             'cache_duration': CACHE_DURATION
         }
@@ -117,14 +456,110 @@ def get_admin_stats(force_refresh=False):
             'error': True
         }
 
+def clear_stats_cache():
+    """Forget this worker's cached stats"""
+    global _stats_cache, _stats_cache_time
+    _stats_cache = None
+    _stats_cache_time = 0
+
+coherence.register('stats', clear_stats_cache)
+# The home page shows the product / category / enquiry totals
+coherence.register('stats', lambda: page_cache.invalidate('index'))
+
+def stats_changed():
+    """Drop this worker's copies of the figures and tell every other worker"""
+    clear_stats_cache()
+    page_cache.invalidate('index')
+    coherence.bump('stats')
+
+# Reconciliation corrects the figures behind every worker's back
+stats_counters.on_reconcile = stats_changed
+
+# Pushes the new-enquiry count to every open admin tab in this worker
+enquiry_count_events = Broadcaster(max_subscribers=app.config['SSE_MAX_CLIENTS'])
+
+def publish_enquiry_count():
+    """Push the current new-enquiry count to connected admin tabs"""
+    enquiry_count_events.publish_from(lambda: stats_counters.read()['new_enquiries'])
+
+# Writes made by other workers reach this one as a 'stats' version change
+coherence.register('stats', publish_enquiry_count)
+
 # Models
-class AdminUser(UserMixin):
+class AdminUser:
+    """
+    Session user for Flask-Login. Implements the UserMixin interface itself
+    so __slots__ actually drops the per-instance __dict__ (instances are
+    shared read-only through the user cache).
+    """
+    __slots__ = ('id', 'username', 'email', 'role', 'created_at')
+    
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+    
     def __init__(self, user_data):
         self.id = str(user_data['_id'])
         self.username = user_data['username']
         self.email = user_data['email']
         self.role = user_data.get('role', 'admin')
         self.created_at = user_data.get('created_at', datetime.utcnow())
+    
+    def get_id(self):
+        return self.id
+    
+    def __eq__(self, other):
+        return isinstance(other, AdminUser) and self.id == other.id
+    
+    def __ne__(self, other):
+        return not self == other
+    
+    __hash__ = object.__hash__
+
+# Fields AdminUser needs; keeps password hashes out of the user cache
+ADMIN_USER_FIELDS = {'username': 1, 'email': 1, 'role': 1, 'created_at': 1}
+
+user_cache = TTLCache(maxsize=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+coherence.register('users', user_cache.clear)
+
+def invalidate_user_cache(user_id=None):
+    """Drop cached session users after a user or role change (all workers)"""
+    if user_id:
+        user_cache.invalidate(('user', str(user_id)))
+    else:
+        user_cache.clear()
+    coherence.bump('users')
+
+def save_password_hash(user, new_hash):
+    """Store a rehashed password unless it was changed in the meantime"""
+    admin_users_collection.update_one({'_id': user['_id'], 'password': user['password']},
+                                      {'$set': {'password': new_hash}})
+    invalidate_user_cache(user['_id'])
+
+@app.cli.command('invalidate-user-cache')
+@click.argument('user_id', required=False)
+def invalidate_user_cache_command(user_id):
+    """Make every worker reload a user (or all users) changed outside the app"""
+    invalidate_user_cache(user_id)
+    print(f"Cached session users dropped: {user_id or 'all'}")
+
+@app.before_request
+def sync_caches():
+    """Pick up cache invalidations made by other workers"""
+    coherence.check()
+
+@app.before_request
+def start_background_jobs():
+    """Make sure this worker runs the stats reconciliation and email workers"""
+    stats_counters.ensure_reconciler(app.config['STATS_RECONCILE_INTERVAL'])
+    email_queue.ensure_workers()
+
+@app.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    """Recompute the materialized stats counters"""
+    counters = stats_counters.reconcile()
+    print(f"Stats counters reconciled: {counters['total_products']} products, "
+          f"{counters['total_enquiries']} enquiries")
 
 # ========== CONTEXT PROCESSOR ==========
 @app.context_processor
@@ -144,7 +579,7 @@ def inject_template_vars():
             'debug': app.config.get('DEBUG', False)
         },
         'request_endpoint': request.endpoint if request else None,
-        'categories': list(categories_collection.find().sort('name', 1).limit(10))
+        'sse_enabled': app.config['SSE_ENABLED']
     }
     
     # Add user info if logged in
@@ -159,10 +594,16 @@ def inject_template_vars():
 
 @login_manager.user_loader
 def load_user(user_id):
-    user_data = admin_users_collection.find_one({'_id': ObjectId(user_id)})
-    if user_data:
-        return AdminUser(user_data)
-    return None
+    """Load the session user through the short-TTL user cache"""
+    key = ('user', user_id)
+    user = user_cache.get(key)
+    if user is None:
+        user_data = admin_users_collection.find_one({'_id': ObjectId(user_id)}, ADMIN_USER_FIELDS)
+        if not user_data:
+            return None
+        user = AdminUser(user_data)
+        user_cache.set(key, user)
+    return user
 
 # Forms
 class LoginForm(FlaskForm):
@@ -240,7 +681,7 @@ class EnquiryForm(FlaskForm):
     submit = SubmitField('Send Enquiry')
 
 def log_activity(action, details, user_id=None):
-    """Log admin activities"""
+    """Log admin activities (buffered, written in batches by activity_sink)"""
     activity = {
         'action': action,
         'details': details,
@@ -249,98 +690,153 @@ def log_activity(action, details, user_id=None):
         'timestamp': datetime.utcnow(),
         'ip_address': request.remote_addr
     }
-    activity_logs_collection.insert_one(activity)
+    activity_sink.record(activity)
+
+def parse_date_arg(name):
+    """Read a YYYY-MM-DD query argument as a datetime, or None"""
+    try:
+        return datetime.strptime(request.args.get(name, ''), '%Y-%m-%d')
+    except ValueError:
+        return None
 
 def save_uploaded_file(file):
-    """Save uploaded file and return filename"""
-    if file and file.filename:
-        filename = secure_filename(file.filename)
-        unique_filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        try:
-            file.save(file_path)
-            return unique_filename
-        except Exception as e:
-            app.logger.error(f"Failed to save file: {e}")
-            return None
-    return None
+    """Save uploaded file (deduplicated by content) and return its path under uploads"""
+    return upload_store.save(file)
 
 def get_categories():
     """Get all categories for dropdowns"""
-    categories = categories_collection.find().sort('name', 1)
-    return [(str(cat['_id']), cat['name']) for cat in categories]
+    return catalog_cache.get_or_load(
+        ('categories', 'choices'),
+        lambda: [(str(cat['_id']), cat['name'])
+                 for cat in categories_collection.find({}, {'name': 1}).sort('name', 1)])
+
+def menu_categories():
+    """First categories by name, for the nav menu and the related-categories strip"""
+    return catalog_cache.get_or_load(
+        ('categories', 'menu'),
+        lambda: list(catalog_categories.find().sort('name', 1).limit(10)))
+
+# Called from base.html's cached nav fragment, so only on a fragment miss
+app.add_template_global(menu_categories)
+
+def get_product(product_id):
+    """Get a single product document through the catalog cache"""
+    return catalog_cache.get_or_load(
+        ('product', str(product_id)),
+        lambda: catalog_products.find_one({'_id': ObjectId(product_id)}))
+
+def product_last_modified(product_id):
+    """Latest updated_at of a product and its category (the page shows both), or None"""
+    try:
+        product = get_product(product_id)
+        category = get_category(product['category_id']) if product else None
+    except Exception:
+        return None
+    if not product:
+        return None
+    stamps = [doc.get('updated_at') for doc in (product, category) if doc]
+    stamps = [stamp for stamp in stamps if stamp]
+    return max(stamps) if stamps else None
+
+def get_category(category_id):
+    """Get a single category document through the catalog cache"""
+    return catalog_cache.get_or_load(
+        ('category', str(category_id)),
+        lambda: catalog_categories.find_one({'_id': ObjectId(category_id)}))
 
 # Routes - Public Pages
 @app.route('/')
+@cache_policy('catalog')
+@catalog_conditional(with_stats=True)
+@page_cache.cached()
 def index():
     """Homepage"""
-    featured_categories = list(categories_collection.find().limit(6))
-    featured_products = list(products_collection.find({'is_featured': 'yes'}).limit(8))
+    featured_categories = catalog_cache.get_or_load(
+        ('categories', 'home'),
+        lambda: list(catalog_categories.find().limit(6)))
+    featured_products = catalog_cache.get_or_load(
+        ('featured', 'home'),
+        lambda: list(catalog_products.find({'is_featured': 'yes'}).limit(8)))
     
     return render_template('public/index.html', 
                          categories=featured_categories,
                          featured_products=featured_products)
 
 @app.route('/about')
+@cache_policy('catalog')
+@catalog_conditional()
+@page_cache.cached()
 def about():
     """About Us page"""
     return render_template('public/about.html')
 
 @app.route('/categories')
+@cache_policy('catalog')
+@catalog_conditional()
+@page_cache.cached()
 def categories():
     """All categories page"""
-    all_categories = list(categories_collection.find().sort('name', 1))
+    all_categories = list(catalog_categories.find().sort('name', 1))
     
     # Get product count for each category
-    products_count = {}
-    for category in all_categories:
-        count = products_collection.count_documents({'category_id': str(category['_id'])})
-        products_count[str(category['_id'])] = count
+    products_count = category_counts.all()
     
     return render_template('public/categories.html', 
                          categories=all_categories,
                          products_count=products_count)
 
 @app.route('/category/<category_id>')
+@cache_policy('catalog')
+@catalog_conditional()
+@page_cache.cached()
 def category_products(category_id):
     """Products in a specific category"""
-    category = categories_collection.find_one({'_id': ObjectId(category_id)})
+    category = catalog_categories.find_one({'_id': ObjectId(category_id)})
     if not category:
         flash('Category not found', 'error')
         return redirect(url_for('categories'))
     
-    products = list(products_collection.find({'category_id': category_id}))
+    products = list(catalog_products.find({'category_id': category_id}))
     return render_template('public/category_products.html', 
                          category=category, 
-                         products=products)
+                         products=products,
+                         categories=menu_categories())
 
 @app.route('/products')
+@cache_policy('catalog')
+@search_conditional(search_index, param='search')
 def all_products():
     """All products with filters"""
     search = request.args.get('search', '')
     category = request.args.get('category', '')
     
-    query = {}
     if search:
-        query['$text'] = {'$search': search}
-    if category:
-        query['category_id'] = category
-    
-    products = list(products_collection.find(query).sort('created_at', -1))
+        # Keep the search ranking: page through the ranked ids by position
+        page = rank_page(catalog_products, search_product_ids(search, category_id=category or None),
+                         per_page=app.config['PRODUCTS_PER_PAGE'],
+                         after=request.args.get('after'),
+                         before=request.args.get('before'))
+    else:
+        query = {'category_id': category} if category else {}
+        page = keyset_page(catalog_products, query,
+                           per_page=app.config['PRODUCTS_PER_PAGE'],
+                           after=request.args.get('after'),
+                           before=request.args.get('before'),
+                           total=count_total(catalog_products, query))
+    products = page.items
     
     # Get categories for dropdown and create dictionaries
-    all_categories = list(categories_collection.find().sort('name', 1))
+    all_categories = list(catalog_categories.find().sort('name', 1))
     category_dict = {str(cat['_id']): cat['name'] for cat in all_categories}
     categories_list = [(str(cat['_id']), cat['name']) for cat in all_categories]
     
     # Get product counts per category
-    products_count = {}
-    for cat in all_categories:
-        count = products_collection.count_documents({'category_id': str(cat['_id'])})
-        products_count[str(cat['_id'])] = count
+    products_count = category_counts.all()
     
     return render_template('public/products.html', 
                          products=products,
+                         page=page,
+                         total_products=page.total,
                          categories=categories_list,
                          category_dict=category_dict,
                          products_count=products_count,
@@ -348,21 +844,26 @@ def all_products():
                          selected_category=category)
 
 @app.route('/product/<product_id>')
+@cache_policy('catalog')
+@catalog_conditional(last_modified_func=product_last_modified)
+@page_cache.cached()
 def product_detail(product_id):
     """Product detail page"""
-    product = products_collection.find_one({'_id': ObjectId(product_id)})
+    product = get_product(product_id)
     if not product:
         flash('Product not found', 'error')
         return redirect(url_for('all_products'))
     
-    # Get category name
-    category = categories_collection.find_one({'_id': ObjectId(product['category_id'])})
+    # Get category name (copy so the cached document stays untouched)
+    product = dict(product)
+    category = get_category(product['category_id'])
     product['category_name'] = category['name'] if category else 'Uncategorized'
     
     return render_template('public/product_detail.html', product=product)
 
 
 @app.route('/enquiry', methods=['GET', 'POST'])
+@cache_policy('no-store')
 def enquiry():
     """Submit enquiry form"""
     form = EnquiryForm()
@@ -371,7 +872,7 @@ def enquiry():
     
     if product_id:
         try:
-            product = products_collection.find_one({'_id': ObjectId(product_id)})
+            product = catalog_products.find_one({'_id': ObjectId(product_id)})
             if product:
                 form.product_id.data = product_id
         except Exception as e:
@@ -382,12 +883,15 @@ def enquiry():
             try:
                 # Handle file upload FIRST
                 uploaded_files = []
+                uploaded_file_names = []
                 file = request.files.get('spec_files')
                 
                 if file and file.filename:
                     filename = save_uploaded_file(file)
                     if filename:
                         uploaded_files.append(filename)
+                        # Stored under its content hash; keep the client's name for emails
+                        uploaded_file_names.append(secure_filename(file.filename))
                 
                 # Save enquiry to database
                 enquiry_data = {
@@ -403,6 +907,7 @@ def enquiry():
                     'delivery_urgency': form.delivery_urgency.data,
                     'product_id': form.product_id.data or '',
                     'uploaded_files': uploaded_files,
+                    'uploaded_file_names': uploaded_file_names,
                     'status': 'new',
                     'created_at': datetime.utcnow(),
                     'ip_address': request.remote_addr
@@ -411,12 +916,12 @@ def enquiry():
                 # Insert enquiry
                 result = enquiries_collection.insert_one(enquiry_data)
                 enquiry_id = str(result.inserted_id)
+                stats_counters.enquiry_added(enquiry_data['status'])
+                stats_changed()
+                publish_enquiry_count()
                 
-                # Send emails ASYNCHRONOUSLY (in background)
-                threading.Thread(
-                    target=send_enquiry_emails,
-                    args=(enquiry_id, enquiry_data, uploaded_files)
-                ).start()
+                # Queue emails; the email workers send them in the background
+                queue_enquiry_emails(enquiry_id, enquiry_data, uploaded_files)
                 
                 flash('Your enquiry has been submitted successfully! We will contact you soon.', 'success')
                 return redirect(url_for('enquiry_success', enquiry_id=enquiry_id))
@@ -436,20 +941,10 @@ def enquiry():
                          product_id=product_id,
                          product=product)
 
-def send_enquiry_emails(enquiry_id, enquiry_data, uploaded_files):
-    """Send enquiry emails in background thread with app context"""
-    # Create app context for this thread
-    with app.app_context():
-        try:
-            # Email to admin
-            msg = Message(
-                subject=f'New Quote Request #{enquiry_id} - MUMBAI-TECH',
-                recipients=[app.config['MAIL_USERNAME']],
-                sender=app.config['MAIL_DEFAULT_SENDER']
-            )
-            
-            # Create a simpler message without HTML
-            msg.body = f"""
+def queue_enquiry_emails(enquiry_id, enquiry_data, uploaded_files):
+    """Queue the admin notification and client confirmation for an enquiry"""
+    # Email to admin
+    admin_body = f"""
             New Quote Request Received
             ===========================
             
@@ -481,24 +976,9 @@ def send_enquiry_emails(enquiry_id, enquiry_data, uploaded_files):
             This enquiry was submitted on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}
             IP Address: {enquiry_data.get('ip_address', 'Unknown')}
             """
-            
-            # Attach uploaded files
-            for filename in uploaded_files:
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                if os.path.exists(file_path):
-                    with open(file_path, 'rb') as fp:
-                        msg.attach(filename, 'application/octet-stream', fp.read())
-            
-            mail.send(msg)
-            app.logger.info(f"Admin email sent for enquiry #{enquiry_id}")
-            
-            # Confirmation email to client
-            client_msg = Message(
-                subject='Thank you for your quote request - MUMBAI-TECH',
-                recipients=[enquiry_data['email']],
-                sender=app.config['MAIL_DEFAULT_SENDER']
-            )
-            client_msg.body = f"""
+    
+    # Confirmation email to client
+    client_body = f"""
             Dear {enquiry_data['name']},
             
             Thank you for submitting your quote request to Mumbai-Tech.
@@ -512,13 +992,65 @@ def send_enquiry_emails(enquiry_id, enquiry_data, uploaded_files):
             Best regards,
             Mumbai-Tech Industrial Solutions
             """
-            mail.send(client_msg)
-            app.logger.info(f"Client confirmation email sent for enquiry #{enquiry_id}")
-            
-        except Exception as e:
-            app.logger.error(f"Failed to send email for enquiry #{enquiry_id}: {str(e)}")
+    
+    try:
+        email_queue.enqueue([
+            {
+                'subject': f'New Quote Request #{enquiry_id} - MUMBAI-TECH',
+                'recipients': [app.config['MAIL_USERNAME']],
+                'sender': app.config['MAIL_DEFAULT_SENDER'],
+                'body': admin_body,
+                'attachments': [{'path': path, 'filename': name} for path, name in
+                                zip(uploaded_files, enquiry_data['uploaded_file_names'])]
+            },
+            {
+                'subject': 'Thank you for your quote request - MUMBAI-TECH',
+                'recipients': [enquiry_data['email']],
+                'sender': app.config['MAIL_DEFAULT_SENDER'],
+                'body': client_body
+            }
+        ], reference=f'enquiry:{enquiry_id}')
+    except Exception as e:
+        app.logger.error(f"Failed to queue emails for enquiry #{enquiry_id}: {str(e)}")
+
+@app.cli.command('gc-uploads')
+def gc_uploads_command():
+    """Delete uploaded files that are no longer referenced"""
+    removed = upload_store.collect_garbage()
+    print(f"Removed {removed} unreferenced upload(s)")
+
+@app.cli.command('backfill-search-fields')
+def backfill_search_fields_command():
+    """Populate the normalized search fields on existing products"""
+    updated = 0
+    for product in products_collection.find({}, {'name': 1, 'part_number': 1}):
+        products_collection.update_one({'_id': product['_id']},
+                                       {'$set': shadow_fields(product),
+                                        '$unset': {'name_norm': '', 'part_number_norm': ''}})
+        updated += 1
+    print(f"Updated search fields on {updated} product(s)")
+
+@app.cli.command('backfill-images')
+def backfill_images_command():
+    """Build thumbnails and WebP/AVIF variants for existing product images"""
+    built = image_pipeline.backfill()
+    print(f"Built variants for {built} image(s)")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Bundle, minify, fingerprint and pre-compress CSS/JS into static/dist"""
+    manifest = build_assets(app.static_folder)
+    assets.reload()
+    print(f"Built {len(manifest)} asset(s) into static/dist")
+
+@app.cli.command('send-queued-emails')
+def send_queued_emails_command():
+    """Send every due email job now"""
+    sent = email_queue.drain()
+    print(f"Processed {sent} email job(s)")
 
 @app.route('/enquiry/success/<enquiry_id>')
+@cache_policy('no-store')
 def enquiry_success(enquiry_id):
     """Enquiry success confirmation page"""
     try:
@@ -536,6 +1068,7 @@ def enquiry_success(enquiry_id):
         return redirect(url_for('index'))
     
 @app.route('/test-email')
+@cache_policy('no-store')
 def test_email():
     """Test email functionality"""
     try:
@@ -555,6 +1088,7 @@ def test_email():
         return f'Failed to send email: {str(e)}'
 
 @app.route('/debug-email')
+@cache_policy('no-store')
 def debug_email():
     """Debug email configuration"""
     import smtplib
@@ -581,16 +1115,18 @@ def debug_email():
     return jsonify(config_status)
 
 @app.route('/search')
+@cache_policy('catalog')
+@search_conditional(search_index)
 def search():
     """Search products"""
     query = request.args.get('q', '')
     if not query:
         return redirect(url_for('all_products'))
     
-    products = list(products_collection.find(
-        {'$text': {'$search': query}},
-        {'score': {'$meta': 'textScore'}}
-    ).sort([('score', {'$meta': 'textScore'})]).limit(50))
+    # Rank in the search index, then load the matches in ranked order
+    ranked = search_product_ids(query, limit=50)
+    found = {p['_id']: p for p in catalog_products.find({'_id': {'$in': ranked}})}
+    products = [found[oid] for oid in ranked if oid in found]
     
     return render_template('public/search_results.html', 
                          products=products, 
@@ -606,8 +1142,21 @@ def admin_login():
     form = LoginForm()
     if form.validate_on_submit():
         user = admin_users_collection.find_one({'username': form.username.data})
-        if user and bcrypt.check_password_hash(user['password'], form.password.data):
+        try:
+            valid = bool(user) and password_hasher.verify(user['password'], form.password.data)
+        except LoginOverloaded:
+            app.logger.warning(f'Login for {form.username.data} shed, password pool is full')
+            flash('Too many login attempts right now. Please try again shortly.', 'error')
+            response = make_response(render_template('admin/login.html', form=form), 503)
+            response.headers['Retry-After'] = '5'
+            return response
+        
+        if valid:
+            password_hasher.upgrade(
+                user['password'], form.password.data,
+                lambda new_hash: save_password_hash(user, new_hash))
             user_obj = AdminUser(user)
+            user_cache.set(('user', user_obj.id), user_obj)
             login_user(user_obj, remember=True)
             log_activity('login', f'User {form.username.data} logged in', str(user['_id']))
             flash('Logged in successfully!', 'success')
@@ -623,6 +1172,7 @@ def admin_login():
 def admin_logout():
     """Admin logout"""
     log_activity('logout', f'User {current_user.username} logged out', current_user.id)
+    invalidate_user_cache(current_user.id)
     logout_user()
     flash('You have been logged out.', 'info')
     return redirect(url_for('admin_login'))
@@ -650,57 +1200,51 @@ def admin_dashboard():
 @login_required
 def admin_products():
     """Admin product management with pagination"""
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
+    per_page = app.config['PRODUCTS_PER_PAGE']
     
     # Get search and filter parameters
     search = request.args.get('search', '')
+    fulltext = request.args.get('fulltext') == '1'
     category = request.args.get('category', '')
     stock_status = request.args.get('stock_status', '')
     
-    # Build query
+    # Build query (indexed prefix match on normalized fields, or opt-in full text)
     query = {}
     if search:
-        query['$or'] = [
-            {'name': {'$regex': search, '$options': 'i'}},
-            {'part_number': {'$regex': search, '$options': 'i'}},
-            {'description': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(admin_search_filter(search, fulltext=fulltext))
     if category:
         query['category_id'] = category
     if stock_status:
         query['stock_status'] = stock_status
     
-    # Calculate total for pagination
-    total = products_collection.count_documents(query)
-    total_pages = (total + per_page - 1) // per_page if per_page > 0 else 1
-    
-    # Get products with pagination
-    skip = (page - 1) * per_page
-    products = list(products_collection.find(query)
-                   .sort('created_at', -1)
-                   .skip(skip)
-                   .limit(per_page))
+    # Get products with keyset pagination (total is estimated when unfiltered)
+    page = keyset_page(products_collection, query,
+                       per_page=per_page,
+                       after=request.args.get('after'),
+                       before=request.args.get('before'),
+                       total=count_total(products_collection, query))
+    products = page.items
     
     # Get categories for dropdown
     categories = list(categories_collection.find().sort('name', 1))
     category_dict = {str(cat['_id']): cat['name'] for cat in categories}
     
     # Update product count for each category in category dict
+    counts = category_counts.all()
     for cat_id in category_dict:
         category_dict[cat_id] = {
             'name': category_dict[cat_id],
-            'count': products_collection.count_documents({'category_id': cat_id})
+            'count': counts.get(cat_id, 0)
         }
     
     return render_template('admin/products.html', 
                          products=products,
                          category_dict=category_dict,
                          categories=categories,
-                         current_page=page,
-                         total_pages=total_pages,
-                         total_products=total,
+                         page=page,
+                         total_products=page.total,
                          search=search,
+                         fulltext=fulltext,
                          selected_category=category,
                          selected_stock=stock_status)
 
@@ -727,6 +1271,7 @@ def add_product():
             'updated_at': datetime.utcnow(),
             'created_by': current_user.id
         }
+        product_data.update(shadow_fields(product_data))
         
         # Handle image upload
         images = request.files.getlist('images')
@@ -742,6 +1287,11 @@ def add_product():
         
         # Insert product
         result = products_collection.insert_one(product_data)
+        search_index.upsert(product_data)
+        image_pipeline.submit(result.inserted_id, uploaded_images)
+        stats_counters.product_added(product_data)
+        category_counts.invalidate()
+        invalidate_product_cache(result.inserted_id)
         
         log_activity('add_product', 
                     f'Added product: {form.name.data}',
@@ -778,15 +1328,18 @@ def edit_product(product_id):
             'is_featured': form.is_featured.data,
             'updated_at': datetime.utcnow()
         }
+        update_data.update(shadow_fields(update_data))
         
         # Handle image upload
         images = request.files.getlist('images')
         uploaded_images = product.get('images', [])
+        new_images = []
         for image in images:
             if image and image.filename:
                 filename = save_uploaded_file(image)
                 if filename:
                     uploaded_images.append(filename)
+                    new_images.append(filename)
         
         if uploaded_images:
             update_data['images'] = uploaded_images
@@ -796,6 +1349,12 @@ def edit_product(product_id):
             {'_id': ObjectId(product_id)},
             {'$set': update_data}
         )
+        search_index.upsert({**product, **update_data})
+        image_pipeline.submit(product_id, new_images)
+        stats_counters.product_changed(product, update_data)
+        if product.get('category_id') != update_data['category_id']:
+            category_counts.invalidate()
+        invalidate_product_cache(product_id)
         
         log_activity('edit_product', 
                     f'Edited product: {form.name.data}',
@@ -813,6 +1372,11 @@ def delete_product(product_id):
     product = products_collection.find_one({'_id': ObjectId(product_id)})
     if product:
         products_collection.delete_one({'_id': ObjectId(product_id)})
+        upload_store.release(product.get('images', []))
+        search_index.remove(product_id)
+        stats_counters.product_removed(product)
+        category_counts.invalidate()
+        invalidate_product_cache(product_id)
         log_activity('delete_product', 
                     f'Deleted product: {product["name"]}',
                     current_user.id)
@@ -829,8 +1393,9 @@ def admin_categories():
     categories = list(categories_collection.find().sort('name', 1))
     
     # Add product count to each category
+    counts = category_counts.all()
     for category in categories:
-        category['product_count'] = products_collection.count_documents({'category_id': str(category['_id'])})
+        category['product_count'] = counts.get(str(category['_id']), 0)
     
     return render_template('admin/categories.html', categories=categories)
 
@@ -850,6 +1415,8 @@ def add_category():
         }
         
         categories_collection.insert_one(category_data)
+        stats_counters.category_added()
+        invalidate_category_cache()
         
         log_activity('add_category', 
                     f'Added category: {form.name.data}',
@@ -883,6 +1450,7 @@ def edit_category(category_id):
             {'_id': ObjectId(category_id)},
             {'$set': update_data}
         )
+        invalidate_category_cache(category_id)
         
         log_activity('edit_category', 
                     f'Edited category: {form.name.data}',
@@ -905,6 +1473,8 @@ def delete_category(category_id):
             flash(f'Cannot delete category with {product_count} products. Move or delete products first.', 'error')
         else:
             categories_collection.delete_one({'_id': ObjectId(category_id)})
+            stats_counters.category_removed()
+            invalidate_category_cache(category_id)
             log_activity('delete_category', 
                         f'Deleted category: {category["name"]}',
                         current_user.id)
@@ -924,16 +1494,27 @@ def admin_enquiries():
     if status != 'all':
         query['status'] = status
     
-    enquiries = list(enquiries_collection.find(query).sort('created_at', -1))
+    page = keyset_page(enquiries_collection, query,
+                       per_page=app.config['ENQUIRIES_PER_PAGE'],
+                       after=request.args.get('after'),
+                       before=request.args.get('before'))
+    enquiries = page.items
+    
+    # Get product names for enquiries in a single $in query
+    product_ids = {ObjectId(e['product_id']) for e in enquiries
+                   if e.get('product_id') and ObjectId.is_valid(e['product_id'])}
+    product_names = {}
+    if product_ids:
+        product_names = {str(p['_id']): p['name'] for p in
+                         products_collection.find({'_id': {'$in': list(product_ids)}}, {'name': 1})}
     
-    # Get product names for enquiries
     for enquiry in enquiries:
         if enquiry.get('product_id'):
-            product = products_collection.find_one({'_id': ObjectId(enquiry['product_id'])})
-            enquiry['product_name'] = product['name'] if product else 'Product deleted'
+            enquiry['product_name'] = product_names.get(enquiry['product_id'], 'Product deleted')
     
     return render_template('admin/enquiries.html', 
                          enquiries=enquiries,
+                         page=page,
                          current_status=status)
 
 @app.route('/admin/enquiry/<enquiry_id>')
@@ -962,10 +1543,15 @@ def update_enquiry_status(enquiry_id, status):
         flash('Invalid status', 'error')
         return redirect(url_for('view_enquiry', enquiry_id=enquiry_id))
     
-    enquiries_collection.update_one(
+    previous = enquiries_collection.find_one_and_update(
         {'_id': ObjectId(enquiry_id)},
-        {'$set': {'status': status, 'updated_at': datetime.utcnow()}}
+        {'$set': {'status': status, 'updated_at': datetime.utcnow()}},
+        projection={'status': 1}
     )
+    if previous:
+        stats_counters.enquiry_status_changed(previous.get('status'), status)
+    stats_changed()
+    publish_enquiry_count()
     
     log_activity('update_enquiry_status', 
                 f'Updated enquiry {enquiry_id} to {status}',
@@ -977,14 +1563,78 @@ def update_enquiry_status(enquiry_id, status):
 @app.route('/admin/activities')
 @login_required
 def admin_activities():
-    """View activity logs"""
-    activities = list(activity_logs_collection.find()
-                     .sort('timestamp', -1)
-                     .limit(100))
-    return render_template('admin/activities.html', activities=activities)
+    """View activity logs (filtered, keyset-paginated)"""
+    filters = {
+        'action': request.args.get('action', ''),
+        'user_id': request.args.get('user_id', ''),
+        'since': request.args.get('since', ''),
+        'until': request.args.get('until', '')
+    }
+    
+    since = parse_date_arg('since')
+    until = parse_date_arg('until')
+    query = activity_filter(action=filters['action'] or None,
+                            user_id=filters['user_id'] or None,
+                            since=since,
+                            until=until + timedelta(days=1) if until else None)
+    
+    page = keyset_page(activity_logs_collection, query,
+                       per_page=app.config['ACTIVITIES_PER_PAGE'],
+                       after=request.args.get('after'),
+                       before=request.args.get('before'),
+                       field='timestamp')
+    users = list(admin_users_collection.find({}, {'username': 1}).sort('username', 1))
+    
+    return render_template('admin/activities.html',
+                         activities=page.items,
+                         page=page,
+                         filters=filters,
+                         filter_args={k: v for k, v in filters.items() if v},
+                         actions=ACTIVITY_ACTIONS,
+                         users=users)
+
+@app.route('/admin/export/<kind>')
+@login_required
+def admin_export(kind):
+    """
+    Stream enquiries or products as CSV / JSON Lines straight from the
+    cursor. Filters: status (stock status for products), since/until
+    (YYYY-MM-DD, inclusive); gzip=1 compresses on the fly.
+    """
+    exports = {
+        'enquiries': (enquiries_collection, ENQUIRY_FIELDS, 'status'),
+        'products': (products_collection, PRODUCT_FIELDS, 'stock_status')
+    }
+    if kind not in exports:
+        abort(404)
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    
+    collection, fields, status_field = exports[kind]
+    until = parse_date_arg('until')
+    query = export_query(status_field,
+                         status=request.args.get('status') or None,
+                         since=parse_date_arg('since'),
+                         until=until + timedelta(days=1) if until else None)
+    compress = request.args.get('gzip') == '1'
+    
+    filename = f"{kind}-{datetime.utcnow().strftime('%Y%m%d-%H%M')}.{fmt}"
+    mimetype = EXPORT_FORMATS[fmt]
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    
+    body = stream_export(collection, query, fields, fmt=fmt,
+                         batch_size=app.config['EXPORT_BATCH_SIZE'],
+                         compress=compress)
+    return Response(body, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"',
+                             'X-Accel-Buffering': 'no'})
 
 # ========== API ENDPOINTS ==========
 @app.route('/api/stats')
+@cache_policy('no-store')
 @login_required
 def api_stats():
     """API endpoint for stats (AJAX calls)"""
@@ -996,44 +1646,122 @@ def api_stats():
 @login_required
 def refresh_stats():
     """Manually refresh stats cache"""
+    stats_changed()
     stats = get_admin_stats(force_refresh=True)
     flash(f'Stats refreshed: {stats["new_enquiries"]} new enquiries', 'info')
     return redirect(request.referrer or url_for('admin_dashboard'))
 
+@app.route('/api/admin/login-stats')
+@login_required
+def api_login_stats():
+    """API endpoint exposing password pool latency and queue depth"""
+    return jsonify(password_hasher.stats())
+
+@app.route('/api/admin/activity-log-stats')
+@login_required
+def api_activity_log_stats():
+    """API endpoint exposing the activity log buffer and dropped-record counters"""
+    return jsonify(activity_sink.stats())
+
+@app.route('/api/admin/cache-stats')
+@login_required
+def api_cache_stats():
+    """API endpoint exposing catalog cache hit/miss counters"""
+    return jsonify({'catalog': catalog_cache.stats(),
+                    'pages': page_cache.stats(),
+                    'fragments': fragment_cache.stats(),
+                    'users': user_cache.stats()})
+
 @app.route('/api/admin/new-enquiries-count')
 @login_required
 def api_new_enquiries_count():
     """API endpoint for real-time enquiry count updates"""
-    count = enquiries_collection.count_documents({'status': 'new'})
+    count = stats_counters.read()['new_enquiries']
     return jsonify({'count': count})
 
+@app.route('/api/admin/new-enquiries-stream')
+@login_required
+def api_new_enquiries_stream():
+    """Server-Sent Events stream of the new-enquiry count"""
+    if not app.config['SSE_ENABLED']:
+        # No threaded/gevent workers: a stream would pin a whole worker
+        return jsonify({'error': 'Streaming disabled'}), 503
+    
+    subscriber = enquiry_count_events.subscribe()
+    if subscriber is None:
+        # Too many open streams; the client falls back to polling
+        return jsonify({'error': 'Too many connections'}), 503
+    
+    initial = stats_counters.read()['new_enquiries']
+    heartbeat = app.config['SSE_HEARTBEAT']
+    deadline = time.monotonic() + app.config['SSE_MAX_STREAM_AGE']
+    
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            yield format_sse({'count': initial}, event='count')
+            # Close periodically so long-lived connections don't pin a worker thread forever
+            while time.monotonic() < deadline:
+                count = subscriber.wait(timeout=heartbeat)
+                if count is None:
+                    # Also picks up changes made in other workers when polling
+                    coherence.check()
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_sse({'count': count}, event='count')
+        finally:
+            enquiry_count_events.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(stream()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/products/search')
+@cache_policy('catalog')
+@search_conditional(search_index)
 def api_search_products():
     """API for product search"""
     query = request.args.get('q', '')
-    limit = int(request.args.get('limit', 10))
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
     
     if not query:
         return jsonify([])
     
-    products = list(products_collection.find(
-        {'$text': {'$search': query}},
-        {'name': 1, 'part_number': 1, 'manufacturer': 1, 'category_id': 1}
-    ).limit(limit))
+    page = rank_page(catalog_products, search_product_ids(query),
+                     per_page=limit,
+                     after=request.args.get('after'),
+                     projection={'name': 1, 'part_number': 1, 'manufacturer': 1,
+                                 'category_id': 1})
+    products = page.items
     
     # Convert ObjectId to string
     for product in products:
         product['_id'] = str(product['_id'])
     
-    return jsonify(products)
+    response = jsonify(products)
+    if page.has_next:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    return response
+
+@app.route('/api/products/autocomplete')
+@cache_policy('catalog')
+@search_conditional(autocomplete)
+def api_autocomplete():
+    """Typeahead suggestions for part numbers, product names and manufacturers"""
+    limit = min(max(request.args.get('limit', 8, type=int), 1), 20)
+    suggestions = autocomplete.suggest(request.args.get('q', ''), limit=limit)
+    return jsonify(suggestions)
 
 @app.route('/api/categories')
+@cache_policy('catalog')
+@catalog_conditional()
 def api_categories():
     """API for categories"""
-    categories = list(categories_collection.find({}, {'name': 1, 'description': 1}))
+    categories = list(catalog_categories.find({}, {'name': 1, 'description': 1}))
+    counts = category_counts.all()
     for cat in categories:
         cat['_id'] = str(cat['_id'])
-        cat['product_count'] = products_collection.count_documents({'category_id': str(cat['_id'])})
+        cat['product_count'] = counts.get(cat['_id'], 0)
     
     return jsonify(categories)
 
@@ -1042,10 +1770,18 @@ def api_categories():
 def add_header(response):
     """
     Add headers to both force latest IE rendering engine or Chrome Frame,
-    and also to cache the rendered page for 10 minutes.
+    and also set Cache-Control from the view's cache policy (private/no-store
+    for admin, long-lived for catalog pages, 10 minutes otherwise).
     """
     response.headers['X-UA-Compatible'] = 'IE=Edge,chrome=1'
-    response.headers['Cache-Control'] = 'public, max-age=600'
+    if response.mimetype != 'text/event-stream':
+        policy = policy_for(app.view_functions.get(request.endpoint), request.path)
+        response.headers['Cache-Control'] = app.config['CACHE_POLICIES'][policy]
+        if policy in ('catalog', 'default'):
+            response.vary.add('Cookie')
+    timing = g.get('fragment_timing')
+    if timing:
+        response.headers.add('Server-Timing', server_timing(timing))
     return response
 
 # Error Handlers
@@ -1073,11 +1809,27 @@ def create_default_admin():
         admin_users_collection.insert_one(admin_user)
         print("Default admin created: username='admin', password='admin123'")
 
+# ========== APPLICATION FACTORY ==========
+def create_app(config_name=None):
+    """
+    Return the application for a config.py class ('development',
+    'production', 'testing'). The objects above are built when app.py is
+    imported, from the class named by FLASK_CONFIG, so config_name has to
+    match it; run.py passes the same variable.
+    """
+    if config_name and config_name != app.config['CONFIG_NAME']:
+        raise ValueError(f'Set FLASK_CONFIG={config_name} before importing app '
+                         f"(it was imported with {app.config['CONFIG_NAME']!r})")
+    return app
+
 # Initialize app
 if __name__ == '__main__':
     # Create upload folder if not exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # Development convenience; deployments run `flask db ensure-indexes`
+    ensure_indexes(mongo, INDEXES)
+    
     # Create default admin
     create_default_admin()
     
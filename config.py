@@ -1,12 +1,36 @@
 import os
 from datetime import timedelta
+from dotenv import load_dotenv
+
+# The class attributes below read the environment when this module is imported
+load_dotenv()
 
 class Config:
     # Security
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'industrial-mumbai-tech-secure-key-2024'
     
     # MongoDB
-    MONGODB_URI = os.environ.get('MONGODB_URI') or 'mongodb://localhost:27017/mumbai_tech_industrial'
+    MONGODB_URI = os.environ.get('MONGODB_URI') or 'mongodb://localhost:27017/mumbai_tech'
+    MONGO_URI = MONGODB_URI
+    MONGO_DBNAME = os.environ.get('MONGODB_DBNAME', 'mumbai_tech')
+    
+    # MongoDB connection pool (None leaves the pymongo default)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 30000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 20000))
+    MONGO_SOCKET_TIMEOUT_MS = None
+    MONGO_TLS = os.environ.get('MONGO_TLS', 'True') == 'True'
+    MONGO_RETRY_WRITES = True
+    MONGO_REPLICA_SET = os.environ.get('MONGO_REPLICA_SET')
+    MONGO_WRITE_CONCERN = 'majority'
+    
+    # Routing per collection handle: 'catalog' is public product/category reads
+    MONGO_READ_PREFERENCES = {'catalog': os.environ.get('MONGO_CATALOG_READ_PREFERENCE', 'primary')}
+    MONGO_WRITE_CONCERNS = {'enquiries': 'majority'}
+    MONGO_MAX_STALENESS_SECONDS = None
     
     # File Uploads
     UPLOAD_FOLDER = os.path.join('static', 'uploads')
@@ -31,6 +55,15 @@ class Config:
     FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
     FLASK_DEBUG = os.environ.get('FLASK_DEBUG', 'True') == 'True'
     
+    # Password hashing cost (existing hashes are upgraded on next login)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    
+    # Activity log retention: 'none' (keep everything), or opt into 'ttl'
+    # (delete records older than N days) or 'capped'
+    ACTIVITY_LOG_RETENTION = os.environ.get('ACTIVITY_LOG_RETENTION', 'none')
+    ACTIVITY_LOG_RETENTION_DAYS = int(os.environ.get('ACTIVITY_LOG_RETENTION_DAYS', 180))
+    ACTIVITY_LOG_CAPPED_MB = int(os.environ.get('ACTIVITY_LOG_CAPPED_MB', 256))
+    
     # Admin Settings
     ADMIN_USERS = ['admin', 'supervisor', 'manager']
     DEFAULT_ADMIN_PASSWORD_HASH = None  # Will be set on first admin creation
@@ -39,6 +72,10 @@ class Config:
     PRODUCTS_PER_PAGE = 20
     ENQUIRIES_PER_PAGE = 15
     
+    # Dashboard enquiry trend ('day' or 'week' buckets)
+    ENQUIRY_TREND_WINDOW = int(os.environ.get('ENQUIRY_TREND_WINDOW', 30))
+    ENQUIRY_TREND_UNIT = os.environ.get('ENQUIRY_TREND_UNIT', 'day')
+    
     # Cache Settings (for production)
     CACHE_TYPE = 'simple'
     CACHE_DEFAULT_TIMEOUT = 300
@@ -53,7 +90,38 @@ class ProductionConfig(Config):
     SESSION_COOKIE_SECURE = True
     MAIL_USE_TLS = True
     
+    # Sized for gunicorn workers sharing one cluster; fail fast if it's unreachable
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 5))
+    MONGO_MAX_IDLE_TIME_MS = 300000
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = 5000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = 5000
+    MONGO_SOCKET_TIMEOUT_MS = 30000
+    
+    # Catalog reads use secondaries except for one staleness window after each
+    # catalog write, so cached pages never pair old data with a new ETag;
+    # enquiries must not be lost
+    MONGO_READ_PREFERENCES = {'catalog': 'secondaryPreferred'}
+    MONGO_WRITE_CONCERNS = {'enquiries': 'majority', 'activity_logs': 1}
+    MONGO_MAX_STALENESS_SECONDS = 90
+    
 class TestingConfig(Config):
     TESTING = True
     DEBUG = True
-    MONGODB_URI = 'mongodb://localhost:27017/mumbai_tech_test'
\ No newline at end of file
+    MONGODB_URI = 'mongodb://localhost:27017/mumbai_tech_test'
+    MONGO_URI = MONGODB_URI
+    MONGO_DBNAME = 'mumbai_tech_test'
+    BCRYPT_LOG_ROUNDS = 4
+    
+    # Local replica set, e.g. `mongod --replSet rs0` + rs.initiate()
+    MONGO_TLS = False
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = 2000
+    MONGO_READ_PREFERENCES = {'catalog': 'secondaryPreferred'}
+    MONGO_WRITE_CONCERNS = {'enquiries': 'majority'}
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+}
\ No newline at end of file
@@ -0,0 +1,17 @@
+# gunicorn.conf.py - Picked up automatically by `gunicorn run:app`
+#
+# The admin enquiry badge is a Server-Sent Events stream that stays open
+# for up to SSE_MAX_STREAM_AGE seconds. Under the default sync workers
+# each open admin tab would tie up a whole worker process, so requests
+# are served by threads (gthread) and the app caps streams at half of a
+# worker's threads (SSE_MAX_CLIENTS). Set SSE_ENABLED=False when running
+# under a server without threaded or gevent workers; the badge then polls.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
@@ -1,9 +1,11 @@
 # routes/admin.py - Premium Admin Routes
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from bson import ObjectId
 from datetime import datetime, timedelta
 import json
+from utils.pagination import keyset_page, count_total
+from utils.search import admin_search_filter
 
 admin_bp = Blueprint('admin_bp', __name__, url_prefix='/admin')
 
@@ -11,14 +13,15 @@ admin_bp = Blueprint('admin_bp', __name__, url_prefix='/admin')
 @login_required
 def premium_dashboard():
     """Premium Admin Dashboard"""
-    # Get statistics
+    # Get statistics (one read of the materialized counters)
+    counters = current_app.extensions['stats_counters'].read()
     stats = {
-        'total_products': products_collection.count_documents({}),
-        'total_categories': categories_collection.count_documents({}),
-        'new_enquiries': enquiries_collection.count_documents({'status': 'new'}),
-        'total_enquiries': enquiries_collection.count_documents({}),
+        'total_products': counters['total_products'],
+        'total_categories': counters['total_categories'],
+        'new_enquiries': counters['new_enquiries'],
+        'total_enquiries': counters['total_enquiries'],
         'active_users': 1,  # Placeholder
-        'stock_low': products_collection.count_documents({'stock_status': 'limited'})
+        'stock_low': counters['stock_low']
     }
     
     # Get recent enquiries
@@ -35,23 +38,11 @@ def premium_dashboard():
     popular_products = list(products_collection.find({'is_featured': 'yes'})
                           .limit(6))
     
-    # Get enquiry trends (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    enquiry_trend = []
-    for i in range(30):
-        day = datetime.utcnow() - timedelta(days=i)
-        start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        count = enquiries_collection.count_documents({
-            'created_at': {'$gte': start, '$lte': end}
-        })
-        enquiry_trend.append({
-            'date': day.strftime('%Y-%m-%d'),
-            'count': count
-        })
-    
-    enquiry_trend.reverse()
+    # Get enquiry trends (single aggregation, closed days cached)
+    enquiry_trend = current_app.extensions['enquiry_trend'].window(
+        size=current_app.config.get('ENQUIRY_TREND_WINDOW', 30),
+        unit=current_app.config.get('ENQUIRY_TREND_UNIT', 'day')
+    )
     
     return render_template('admin/dashboard.html',
                          stats=stats,
@@ -66,35 +57,29 @@ def premium_dashboard():
 @login_required
 def admin_products():
     """Premium Product Management"""
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
+    per_page = current_app.config.get('PRODUCTS_PER_PAGE', 20)
     
     # Filters
     search = request.args.get('search', '')
+    fulltext = request.args.get('fulltext') == '1'
     category = request.args.get('category', '')
     stock_status = request.args.get('stock_status', '')
     
     query = {}
     if search:
-        query['$or'] = [
-            {'name': {'$regex': search, '$options': 'i'}},
-            {'part_number': {'$regex': search, '$options': 'i'}},
-            {'description': {'$regex': search, '$options': 'i'}}
-        ]
+        query.update(admin_search_filter(search, fulltext=fulltext))
     if category:
         query['category_id'] = category
     if stock_status:
         query['stock_status'] = stock_status
     
-    # Get total count for pagination
-    total = products_collection.count_documents(query)
-    total_pages = (total + per_page - 1) // per_page
-    
-    # Get products
-    products = list(products_collection.find(query)
-                   .sort('created_at', -1)
-                   .skip((page - 1) * per_page)
-                   .limit(per_page))
+    # Get products with keyset pagination (total is estimated when unfiltered)
+    page = keyset_page(products_collection, query,
+                       per_page=per_page,
+                       after=request.args.get('after'),
+                       before=request.args.get('before'),
+                       total=count_total(products_collection, query))
+    products = page.items
     
     # Get categories for dropdown
     categories = list(categories_collection.find().sort('name', 1))
@@ -102,8 +87,9 @@ def admin_products():
     return render_template('admin/products.html',
                          products=products,
                          categories=categories,
-                         current_page=page,
-                         total_pages=total_pages,
+                         page=page,
+                         total_products=page.total,
                          search=search,
+                         fulltext=fulltext,
                          selected_category=category,
                          selected_stock=stock_status)
\ No newline at end of file
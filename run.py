@@ -0,0 +1,8 @@
+# run.py - Entry point using the application factory (gunicorn run:app)
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_CONFIG'))
+
+if __name__ == '__main__':
+    app.run(debug=app.config.get('DEBUG', False), host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
@@ -0,0 +1,241 @@
+# tests/fakes.py - In-memory stand-ins for a Mongo collection and an SMTP server
+import copy
+import socketserver
+import threading
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+_MISSING = object()
+
+
+def _get(doc, field):
+    value = doc
+    for part in field.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(value, op, operand):
+    if op == '$in':
+        return value in operand
+    if op == '$ne':
+        return value != operand
+    if value is _MISSING or value is None:
+        return False
+    return {
+        '$gt': lambda: value > operand,
+        '$gte': lambda: value >= operand,
+        '$lt': lambda: value < operand,
+        '$lte': lambda: value <= operand
+    }[op]()
+
+
+def matches(doc, query):
+    """The subset of the Mongo query language the app's helpers use"""
+    for key, condition in (query or {}).items():
+        if key == '$or':
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition):
+            value = _get(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        else:
+            value = _get(doc, key)
+            if (None if value is _MISSING else value) != condition:
+                return False
+    return True
+
+
+def _sorted(docs, sort):
+    docs = list(docs)
+    for field, direction in reversed(sort or []):
+        docs.sort(key=lambda d: (_get(d, field) is _MISSING, _get(d, field)), reverse=direction < 0)
+    return docs
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+        self._sort = None
+        self._limit = 0
+        self.closed = False
+
+    def sort(self, key, direction=None):
+        self._sort = [(key, direction)] if isinstance(key, str) else list(key)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        docs = _sorted(self._docs, self._sort)
+        if self._limit:
+            docs = docs[:self._limit]
+        return iter([copy.deepcopy(d) for d in docs])
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = [copy.deepcopy(d) for d in docs or []]
+        self.cursors = []
+
+    def find(self, query=None, projection=None):
+        cursor = FakeCursor([d for d in self.docs if matches(d, query)])
+        self.cursors.append(cursor)
+        return cursor
+
+    def find_one(self, query=None, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return copy.deepcopy(doc)
+        return None
+
+    def insert_one(self, doc):
+        doc.setdefault('_id', ObjectId())
+        self.docs.append(copy.deepcopy(doc))
+
+        class Result:
+            inserted_id = doc['_id']
+        return Result()
+
+    def _apply(self, doc, update, inserting=False):
+        for op, changes in update.items():
+            if op == '$setOnInsert' and not inserting:
+                continue
+            for field, value in changes.items():
+                *parents, leaf = field.split('.')
+                target = doc
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[leaf] = value if op != '$inc' else target.get(leaf, 0) + value
+
+    def count_documents(self, query, **kwargs):
+        return sum(1 for d in self.docs if matches(d, query))
+
+    def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                self._apply(doc, update)
+                return
+        if upsert:
+            doc = {k: v for k, v in query.items() if not k.startswith('$')}
+            self._apply(doc, update, inserting=True)
+            self.insert_one(doc)
+
+    def replace_one(self, query, replacement):
+        class Result:
+            matched_count = 0
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                self.docs[i] = dict(copy.deepcopy(replacement), _id=doc['_id'])
+                Result.matched_count = 1
+                break
+        return Result()
+
+    def find_one_and_delete(self, query):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.docs.remove(doc)
+                return copy.deepcopy(doc)
+        return None
+
+    def find_one_and_update(self, query, update, sort=None, upsert=False,
+                            return_document=ReturnDocument.BEFORE, projection=None):
+        candidates = _sorted([d for d in self.docs if matches(d, query)], sort)
+        if not candidates:
+            if not upsert:
+                return None
+            self.update_one(query, update, upsert=True)
+            return copy.deepcopy(self.docs[-1]) if return_document == ReturnDocument.AFTER else None
+        doc = candidates[0]
+        before = copy.deepcopy(doc)
+        self._apply(doc, update)
+        return copy.deepcopy(doc) if return_document == ReturnDocument.AFTER else before
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 stub ESMTP')
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 stub')
+            elif verb == 'MAIL':
+                mail_from = command.split(':', 1)[1].strip().strip('<>')
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if address in server.reject:
+                    self.reply('550 Mailbox unavailable')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b'.\r\n', b''):
+                        break
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append({'from': mail_from, 'to': recipients,
+                                            'data': b''.join(data).decode('utf-8')})
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """Local SMTP server that records every message it accepts"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.lock = threading.Lock()
+        self.messages = []
+        self.reject = set()
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,174 @@
+# tests/test_activity_log.py - Buffered, batched activity log writer
+import os
+import threading
+import time
+from pymongo.errors import BulkWriteError, AutoReconnect
+import pytest
+from utils.activity_log import (ActivitySink, TTL_INDEX_NAME, activity_filter,
+                                ensure_retention)
+
+
+class Activities:
+    """Records every insert_many batch; optionally fails them"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+        self.inserted = threading.Event()
+
+    def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        self.batches.append(list(docs))
+        self.inserted.set()
+        if self.error:
+            raise self.error
+
+
+def activity(n):
+    return {'action': 'login', 'details': f'login {n}'}
+
+
+def without_writer(sink):
+    """Keep the writer thread from starting so the buffer only drains on flush()"""
+    sink._writer_pid = os.getpid()
+    return sink
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_records_are_written_in_batches():
+    activities = Activities()
+    sink = ActivitySink(activities, batch_size=3, flush_interval=0.2)
+    for n in range(7):
+        sink.record(activity(n))
+    assert wait_for(lambda: sink.stats()['written'] == 7)
+    assert [len(batch) for batch in activities.batches] == [3, 3, 1]
+    assert [doc['details'] for batch in activities.batches for doc in batch] == [
+        f'login {n}' for n in range(7)]
+    assert sink.stats()['batches'] == 3
+
+
+def test_a_lone_record_waits_for_the_flush_interval():
+    activities = Activities()
+    sink = ActivitySink(activities, batch_size=100, flush_interval=0.3)
+    start = time.monotonic()
+    sink.record(activity(1))
+    assert activities.inserted.wait(5)
+    assert time.monotonic() - start >= 0.25
+
+
+def test_full_buffer_drops_new_records_without_blocking():
+    activities = Activities()
+    sink = without_writer(ActivitySink(activities, max_buffer=2, batch_size=10))
+    start = time.monotonic()
+    for n in range(5):
+        sink.record(activity(n))
+    assert time.monotonic() - start < 0.5
+    assert sink.stats()['buffered'] == 2 and sink.stats()['dropped'] == 3
+    sink.flush()
+    assert [doc['details'] for doc in activities.batches[0]] == ['login 0', 'login 1']
+    assert sink.stats()['written'] == 2
+
+
+def test_flush_drains_the_buffer_in_batches():
+    activities = Activities()
+    sink = without_writer(ActivitySink(activities, batch_size=4))
+    for n in range(10):
+        sink.record(activity(n))
+    sink.flush(close=True)
+    assert [len(batch) for batch in activities.batches] == [4, 4, 2]
+    assert sink.stats()['buffered'] == 0
+
+
+def test_failed_writes_are_counted_not_raised():
+    partial = BulkWriteError({'nInserted': 2, 'writeErrors': [{'index': 2, 'code': 11000}]})
+    activities = Activities(error=partial)
+    sink = without_writer(ActivitySink(activities, batch_size=3))
+    for n in range(3):
+        sink.record(activity(n))
+    sink.flush()
+    assert (sink.stats()['written'], sink.stats()['failed']) == (2, 1)
+
+    activities.error = AutoReconnect('primary stepped down')
+    sink.record(activity(4))
+    sink.flush()
+    assert (sink.stats()['written'], sink.stats()['failed']) == (2, 2)
+
+
+class FakeActivityDB:
+    """Just the database calls ensure_retention makes"""
+
+    def __init__(self, exists=True, capped=False, ttl=None):
+        self.exists, self.capped = exists, capped
+        self.indexes = {TTL_INDEX_NAME: {'expireAfterSeconds': ttl}} if ttl else {}
+        self.calls = []
+
+    def __getitem__(self, name):
+        return self
+
+    def list_collection_names(self, filter=None):
+        return ['activity_logs'] if self.exists else []
+
+    def options(self):
+        return {'capped': True} if self.capped else {}
+
+    def index_information(self):
+        return self.indexes
+
+    def create_index(self, keys, name, expireAfterSeconds):
+        self.calls.append(('create_index', name, expireAfterSeconds))
+
+    def drop_index(self, name):
+        self.calls.append(('drop_index', name))
+
+    def command(self, *args, **kwargs):
+        self.calls.append(args[:2])
+
+    def create_collection(self, name, **kwargs):
+        self.calls.append(('create_collection', kwargs))
+
+
+def test_ttl_retention_is_created_then_adjusted_in_place():
+    fresh = FakeActivityDB()
+    ensure_retention(fresh, 'activity_logs', 'ttl', days=30)
+    assert fresh.calls == [('create_index', TTL_INDEX_NAME, 30 * 86400)]
+
+    changed = FakeActivityDB(ttl=30 * 86400)
+    ensure_retention(changed, 'activity_logs', 'ttl', days=90)
+    assert changed.calls == [('collMod', 'activity_logs')]
+
+    same = FakeActivityDB(ttl=90 * 86400)
+    ensure_retention(same, 'activity_logs', 'ttl', days=90)
+    assert same.calls == []
+
+
+def test_capped_and_none_retention():
+    missing = FakeActivityDB(exists=False)
+    ensure_retention(missing, 'activity_logs', 'capped', capped_bytes=1024)
+    assert missing.calls == [('create_collection', {'capped': True, 'size': 1024})]
+
+    existing = FakeActivityDB()
+    ensure_retention(existing, 'activity_logs', 'capped')
+    assert existing.calls == [('convertToCapped', 'activity_logs')]
+
+    with_ttl = FakeActivityDB(ttl=86400)
+    ensure_retention(with_ttl, 'activity_logs', 'none')
+    assert with_ttl.calls == [('drop_index', TTL_INDEX_NAME)]
+
+    capped = FakeActivityDB(capped=True)
+    assert 'migrated' in ensure_retention(capped, 'activity_logs', 'ttl')
+    assert capped.calls == []
+    with pytest.raises(ValueError):
+        ensure_retention(capped, 'activity_logs', 'forever')
+
+
+def test_activity_filter():
+    assert activity_filter() == {}
+    assert activity_filter(action='login', user_id='u1', since=1, until=2) == {
+        'action': 'login', 'user_id': 'u1', 'timestamp': {'$gte': 1, '$lt': 2}}
+    assert activity_filter(until=2) == {'timestamp': {'$lt': 2}}
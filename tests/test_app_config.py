@@ -0,0 +1,51 @@
+# tests/test_app_config.py - FLASK_CONFIG reaches everything built at import
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, app
+from run import app as served
+print(json.dumps({
+    'same_app': served is app.app,
+    'testing': app.app.config['TESTING'],
+    'per_page': app.app.config['PRODUCTS_PER_PAGE'],
+    'same_site': app.app.config['SESSION_COOKIE_SAMESITE'],
+    'secret_is_default': app.app.config['SECRET_KEY'] == 'industrial-mumbai-tech-secure-key-2024',
+    'bcrypt_rounds': app.password_hasher.rounds,
+    'database': app.mongo.db_name,
+    'read_preferences': app.mongo.read_preferences,
+    'connected': app.mongo.connected,
+}))
+"""
+
+
+def probe(config_name, code=PROBE):
+    env = dict(os.environ, FLASK_CONFIG=config_name, MONGODB_URI='mongodb://192.0.2.1:27017/probe')
+    env.pop('SECRET_KEY', None)
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def test_config_class_is_applied_before_import_time_objects():
+    result = probe('testing')
+    assert result.returncode == 0, result.stderr
+    settings = json.loads(result.stdout.strip().splitlines()[-1])
+    assert settings['same_app'] and settings['testing']
+    assert settings['bcrypt_rounds'] == 4
+    assert settings['database'] == 'mumbai_tech_test'
+    assert settings['read_preferences'] == {'catalog': 'secondaryPreferred'}
+    # Inherited from Config, not only what TestingConfig defines itself
+    assert settings['per_page'] == 20 and settings['same_site'] == 'Lax'
+    assert not settings['secret_is_default']
+    assert not settings['connected']
+
+
+def test_mismatched_or_unknown_config_is_rejected():
+    result = probe('testing', code="import app; app.create_app('production')")
+    assert result.returncode != 0 and 'FLASK_CONFIG=production' in result.stderr
+    result = probe('staging', code='import app')
+    assert result.returncode != 0 and 'Unknown FLASK_CONFIG' in result.stderr
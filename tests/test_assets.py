@@ -0,0 +1,75 @@
+# tests/test_assets.py - Bundled, fingerprinted and pre-compressed static assets
+import gzip
+import os
+from flask import Flask, url_for
+from utils.assets import BUNDLES, AssetManifest, build_assets, minify_css, minify_js
+
+TEMPLATES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+
+
+def make_static(tmp_path):
+    static = tmp_path / 'static'
+    (static / 'css').mkdir(parents=True)
+    (static / 'js').mkdir()
+    (static / 'css' / 'a.css').write_text('/* a */\n.a {\n  color: red;\n}\n')
+    (static / 'css' / 'b.css').write_text('.b { margin: 0 ; }\n')
+    (static / 'js' / 'main.js').write_text('// menu\nfunction go() {\n    return "// not a comment";\n}\n')
+    return static
+
+
+def make_app(static):
+    app = Flask(__name__, static_folder=str(static))
+    manifest = AssetManifest(str(static))
+    manifest.init_app(app)
+    return app, manifest
+
+
+def test_minifiers_keep_code_intact():
+    assert minify_css('/* x */ .a {\n color: red;\n}\n') == '.a{color: red}\n'
+    assert minify_js('  // note\n  var s = "// kept";\n\n') == 'var s = "// kept";\n'
+
+
+def test_build_writes_hashed_compressed_bundles(tmp_path):
+    static = make_static(tmp_path)
+    manifest = build_assets(str(static), bundles={'css/site.css': ['css/a.css', 'css/b.css']})
+    hashed = manifest['css/site.css']
+    assert hashed.startswith('dist/css/site.') and hashed.endswith('.css')
+    data = (static / hashed).read_bytes()
+    assert data == b'.a{color: red}\n\n.b{margin: 0}\n'
+    assert gzip.decompress((static / (hashed + '.gz')).read_bytes()) == data
+    assert manifest['js/main.js'].startswith('dist/js/main.')
+
+
+def test_bundle_urls_fall_back_to_sources_until_built(tmp_path):
+    static = make_static(tmp_path)
+    app, manifest = make_app(static)
+    with app.test_request_context():
+        assert manifest.bundle_urls('css/site.css', sources=['css/a.css', 'css/b.css']) == [
+            '/static/css/a.css', '/static/css/b.css']
+        build_assets(str(static), bundles={'css/site.css': ['css/a.css', 'css/b.css']})
+        manifest.reload()
+        [url] = manifest.bundle_urls('css/site.css')
+        assert url == '/static/' + manifest.entries['css/site.css']
+        assert url_for('static', filename='js/main.js') == '/static/' + manifest.entries['js/main.js']
+
+
+def test_fingerprinted_files_are_served_compressed_and_immutable(tmp_path):
+    static = make_static(tmp_path)
+    build_assets(str(static), bundles={})
+    app, manifest = make_app(static)
+    with app.test_request_context():
+        url = url_for('static', filename='js/main.js')
+    response = app.test_client().get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert b'function go()' in gzip.decompress(response.data)
+
+
+def test_every_bundle_is_used_by_a_template():
+    sources = []
+    for root, _, files in os.walk(TEMPLATES):
+        for name in files:
+            with open(os.path.join(root, name), encoding='utf-8') as f:
+                sources.append(f.read())
+    for bundle in BUNDLES:
+        assert any(f"bundle_urls('{bundle}')" in source for source in sources), bundle
@@ -0,0 +1,53 @@
+# tests/test_autocomplete.py - Sorted-prefix typeahead
+import time
+from bson import ObjectId
+from utils.autocomplete import Autocomplete
+from tests.fakes import FakeCollection
+
+
+def product(name, part_number, manufacturer=''):
+    return {'_id': ObjectId(), 'name': name, 'part_number': part_number,
+            'manufacturer': manufacturer}
+
+
+def make_autocomplete():
+    return Autocomplete(FakeCollection([product('Hydraulic Pump', 'HX-200B', 'Rexroth'),
+                                        product('Relief Valve', 'HX-10', 'Bosch'),
+                                        product('Pump Seal Kit', 'SK-4')]))
+
+
+def test_prefixes_of_part_numbers_names_and_makers():
+    auto = make_autocomplete()
+    assert [s['part'] for s in auto.suggest('hx-2')] == ['HX-200B']
+    assert sorted(s['part'] for s in auto.suggest('hx')) == ['HX-10', 'HX-200B']
+    assert {s['name'] for s in auto.suggest('pu')} == {'Hydraulic Pump', 'Pump Seal Kit'}
+    assert auto.suggest('bosch')[0]['match'] == 'manufacturer'
+    assert auto.suggest('--') == []
+
+
+def test_results_are_unique_and_limited():
+    auto = make_autocomplete()
+    assert len(auto.suggest('p', limit=1)) == 1
+    ids = [s['id'] for s in auto.suggest('pump')]
+    assert len(ids) == len(set(ids))
+
+
+def test_refresh_picks_up_writes_made_during_a_rebuild():
+    auto = make_autocomplete()
+    auto.suggest('hx')
+    rebuild, calls = auto.rebuild, []
+
+    def rebuild_with_a_write():
+        calls.append(1)
+        if len(calls) == 1:
+            auto.products_collection.docs.append(product('Track Bolt', 'TB-1'))
+            auto.refresh()
+        rebuild()
+
+    auto.rebuild = rebuild_with_a_write
+    auto.refresh()
+    deadline = time.monotonic() + 5
+    while (auto._rebuilding or not auto.suggest('tb')) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [s['part'] for s in auto.suggest('tb')] == ['TB-1']
+    assert len(calls) == 2 and not auto._rebuilding
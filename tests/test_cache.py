@@ -0,0 +1,88 @@
+# tests/test_cache.py - Bounded LRU cache with TTL
+import pytest
+from utils import cache as cache_module
+from utils.cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set(('product', '1'), 'pump')
+    clock.now += 9
+    assert cache.get(('product', '1')) == 'pump'
+    clock.now += 2
+    assert cache.get(('product', '1')) is None
+
+
+def test_per_entry_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set(('page', 'a'), 'x', ttl=60)
+    clock.now += 30
+    assert cache.get(('page', 'a')) == 'x'
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2)
+    cache.set(('k', 1), 1)
+    cache.set(('k', 2), 2)
+    cache.get(('k', 1))
+    cache.set(('k', 3), 3)
+    assert cache.get(('k', 2)) is None
+    assert cache.get(('k', 1)) == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_get_or_load_only_loads_on_a_miss(clock):
+    cache = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return ['cat']
+
+    assert cache.get_or_load(('categories', 'menu'), loader) == ['cat']
+    assert cache.get_or_load(('categories', 'menu'), loader) == ['cat']
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_cached_falsy_values_are_hits(clock):
+    cache = TTLCache()
+    cache.set(('product', 'gone'), None)
+    calls = []
+    cache.get_or_load(('count', 'x'), lambda: calls.append(1) or 0)
+    cache.get_or_load(('count', 'x'), lambda: calls.append(1) or 0)
+    assert len(calls) == 1
+
+
+def test_invalidation(clock):
+    cache = TTLCache()
+    for key in [('product', '1'), ('product', '2'), ('category', '1'), ('page', 'index', 'en')]:
+        cache.set(key, key)
+    cache.invalidate(('product', '1'))
+    assert cache.get(('product', '1')) is None
+
+    cache.invalidate_namespace('product')
+    assert cache.get(('product', '2')) is None
+    assert cache.get(('category', '1')) == ('category', '1')
+
+    cache.invalidate_matching(lambda key: key[1] == 'index')
+    assert cache.get(('page', 'index', 'en')) is None
+
+    cache.clear()
+    assert cache.stats()['size'] == 0
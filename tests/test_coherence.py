@@ -0,0 +1,62 @@
+# tests/test_coherence.py - Cross-worker invalidation via version stamps
+import pytest
+from utils.coherence import CacheCoherence
+from tests.fakes import FakeCollection
+
+
+def make_worker(versions, scopes=('catalog', 'stats')):
+    worker = CacheCoherence(versions, mode='poll', check_interval=60)
+    worker.fired = []
+    for scope in scopes:
+        worker.register(scope, lambda scope=scope: worker.fired.append(scope))
+    return worker
+
+
+def test_other_workers_invalidate_after_a_bump():
+    versions = FakeCollection()
+    writer, reader = make_worker(versions), make_worker(versions)
+    assert reader.version('catalog') is None  # not synced yet
+    for worker in (writer, reader):
+        worker.check(force=True)
+    assert reader.version('catalog') == 0
+
+    writer.bump('catalog')
+    reader.check(force=True)
+    assert reader.fired == ['catalog']
+    assert reader.version('catalog') == writer.version('catalog') == 1
+    # The writer invalidated what it touched itself
+    writer.check(force=True)
+    assert writer.fired == []
+
+
+def test_writer_flushes_when_someone_else_wrote_in_between():
+    versions = FakeCollection()
+    first, second = make_worker(versions), make_worker(versions)
+    for worker in (first, second):
+        worker.check(force=True)
+    second.bump('stats')
+    first.bump('stats')
+    first.check(force=True)
+    assert first.fired == ['stats']
+
+
+def test_polling_is_rate_limited():
+    versions = FakeCollection()
+    writer, reader = make_worker(versions), make_worker(versions)
+    reader.check(force=True)
+    writer.bump('catalog')
+    reader.check()
+    assert reader.fired == []
+    reader._last_check -= 61
+    reader.check()
+    assert reader.fired == ['catalog']
+
+
+def test_off_mode_does_nothing():
+    versions = FakeCollection()
+    worker = CacheCoherence(versions, mode='off')
+    worker.bump('catalog')
+    worker.check(force=True)
+    assert versions.docs == [] and worker.version('catalog') is None
+    with pytest.raises(ValueError):
+        CacheCoherence(versions, mode='sometimes')
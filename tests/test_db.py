@@ -0,0 +1,68 @@
+# tests/test_db.py - Connection routing and read_primary windows
+import pytest
+from flask import Flask
+from pymongo.read_preferences import Primary, SecondaryPreferred
+import utils.db as db
+from utils.db import MongoConnection, client_options, read_preference
+
+
+def make_connection(**config):
+    app = Flask(__name__)
+    app.config.update(MONGO_URI='mongodb://192.0.2.1:27017', MONGO_DBNAME='routing_test',
+                      MONGO_SERVER_SELECTION_TIMEOUT_MS=500, **config)
+    connection = MongoConnection()
+    connection.init_app(app)
+    return connection
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_client_options_skip_unset_values():
+    options = client_options({'MONGO_MAX_POOL_SIZE': 50, 'MONGO_SOCKET_TIMEOUT_MS': None,
+                              'MONGO_TLS': True})
+    assert options == {'maxPoolSize': 50, 'tls': True, 'tlsAllowInvalidCertificates': False}
+
+
+def test_read_preference_names():
+    assert isinstance(read_preference('primary'), Primary)
+    assert read_preference('secondaryPreferred', 90).max_staleness == 90
+    with pytest.raises(ValueError):
+        read_preference('secondry')
+
+
+def test_init_app_rejects_typos_and_bounds_staleness():
+    with pytest.raises(ValueError):
+        make_connection(MONGO_READ_PREFERENCES={'catalog': 'secondry'})
+    connection = make_connection(MONGO_READ_PREFERENCES={'catalog': 'secondaryPreferred'})
+    assert connection.max_staleness == db.DEFAULT_MAX_STALENESS
+    assert make_connection().max_staleness is None
+
+
+def test_catalog_reads_stay_on_the_primary_for_one_staleness_window(clock):
+    connection = make_connection(MONGO_READ_PREFERENCES={'catalog': 'secondaryPreferred'},
+                                 MONGO_WRITE_CONCERNS={'enquiries': 'majority'})
+    products = connection.collection('products', 'catalog')
+    enquiries = connection.collection('enquiries')
+    try:
+        # A fresh process starts pinned: earlier writes may not have replicated
+        assert products.read_preference == Primary()
+        assert enquiries.write_concern.document == {'w': 'majority'}
+
+        clock[0] += connection.staleness_window
+        assert products.read_preference == SecondaryPreferred(max_staleness=90)
+
+        connection.read_primary('catalog')
+        assert products.read_preference == Primary()
+        assert connection.pinned('catalog') and not connection.pinned('stats')
+        clock[0] += connection.staleness_window - 1
+        assert connection.pinned('catalog')
+        clock[0] += 1
+        assert products.read_preference == SecondaryPreferred(max_staleness=90)
+    finally:
+        connection.close()
+    assert not connection.connected
@@ -0,0 +1,115 @@
+# tests/test_email_queue.py - EmailQueue against a local SMTP stub
+import os
+import socket
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from flask_mail import Mail
+from utils.email_sender import EmailQueue
+from tests.fakes import FakeCollection, SMTPStub
+
+
+def make_queue(tmp_path, port, **kwargs):
+    app = Flask(__name__)
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=port, MAIL_USE_TLS=False,
+                      MAIL_SUPPRESS_SEND=False, MAIL_DEFAULT_SENDER='noreply@example.com',
+                      UPLOAD_FOLDER=str(tmp_path))
+    jobs = FakeCollection()
+    return EmailQueue(jobs, Mail(app), app, workers=0, **kwargs), jobs
+
+
+def spec(recipient, **extra):
+    return dict({'subject': f'Hello {recipient}', 'recipients': [recipient],
+                 'sender': 'noreply@example.com', 'body': 'Body'}, **extra)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    with SMTPStub() as server:
+        yield server
+
+
+def test_drain_sends_every_message_over_one_connection(tmp_path, smtp):
+    queue, jobs = make_queue(tmp_path, smtp.port)
+    queue.enqueue([spec('admin@example.com'), spec('client@example.com')], reference='enquiry:1')
+    queue.enqueue([spec('other@example.com')])
+
+    assert queue.drain() == 2
+    assert [m['to'] for m in smtp.messages] == [['admin@example.com'], ['client@example.com'],
+                                                ['other@example.com']]
+    assert smtp.connections == 1
+    assert {job['status'] for job in jobs.docs} == {'sent'}
+
+
+def test_attachments_keep_their_original_name(tmp_path, smtp):
+    blob = tmp_path / 'cas' / 'ab'
+    blob.mkdir(parents=True)
+    (blob / 'ab12.pdf').write_bytes(b'%PDF-1.4')
+    queue, _ = make_queue(tmp_path, smtp.port)
+    queue.enqueue([spec('admin@example.com', attachments=[
+        {'path': 'cas/ab/ab12.pdf', 'filename': 'pump-drawing.pdf'},
+        'cas/ab/ab12.pdf'
+    ])])
+
+    queue.drain()
+    data = smtp.messages[0]['data']
+    assert 'filename="pump-drawing.pdf"' in data
+    assert 'filename="ab12.pdf"' in data
+
+
+def test_unreachable_server_backs_off_and_keeps_the_job(tmp_path):
+    queue, jobs = make_queue(tmp_path, free_port(), backoff_seconds=30)
+    queue.enqueue([spec('admin@example.com')])
+
+    assert queue.drain() == 1
+    job = jobs.docs[0]
+    assert job['status'] == 'pending'
+    assert job['attempts'] == 1
+    assert job['next_attempt_at'] > datetime.utcnow() + timedelta(seconds=25)
+
+
+def test_retry_resumes_after_the_messages_already_sent(tmp_path, smtp):
+    queue, jobs = make_queue(tmp_path, smtp.port)
+    smtp.reject.add('client@example.com')
+    queue.enqueue([spec('admin@example.com'), spec('client@example.com')])
+
+    queue.drain()
+    job = jobs.docs[0]
+    assert job['status'] == 'pending' and job['sent_messages'] == 1
+    assert len(smtp.messages) == 1
+
+    smtp.reject.clear()
+    job['next_attempt_at'] = datetime.utcnow()
+    queue.drain()
+    assert [m['to'] for m in smtp.messages] == [['admin@example.com'], ['client@example.com']]
+    assert jobs.docs[0]['status'] == 'sent'
+
+
+def test_job_fails_permanently_after_max_attempts(tmp_path, smtp):
+    queue, jobs = make_queue(tmp_path, smtp.port, max_attempts=2, backoff_seconds=0)
+    smtp.reject.add('client@example.com')
+    queue.enqueue([spec('client@example.com')])
+
+    queue.drain()
+    queue.drain()
+    job = jobs.docs[0]
+    assert job['status'] == 'failed'
+    assert job['attempts'] == 2
+    assert 'client@example.com' in job['last_error']
+
+
+def test_expired_lease_is_handed_out_again(tmp_path, smtp):
+    queue, jobs = make_queue(tmp_path, smtp.port, lease_seconds=60)
+    queue.enqueue([spec('admin@example.com')])
+    # A worker claimed the job and died before sending it
+    jobs.docs[0].update(status='sending', locked_at=datetime.utcnow() - timedelta(minutes=5),
+                        locked_by=os.getpid() + 1)
+
+    assert queue.drain() == 1
+    assert jobs.docs[0]['status'] == 'sent'
@@ -0,0 +1,75 @@
+# tests/test_enquiry_trend.py - Enquiry counts bucketed by day or week
+from datetime import datetime, timedelta
+import pytest
+from utils.enquiry_trend import EnquiryTrend, bucket_start
+
+
+class Enquiries:
+    """Answers EnquiryTrend's $dateTrunc aggregation from a list of timestamps"""
+
+    def __init__(self, created):
+        self.created = created
+        self.since = []
+
+    def aggregate(self, pipeline):
+        match, group = pipeline[0]['$match'], pipeline[1]['$group']
+        start = match['created_at']['$gte']
+        unit = group['_id']['$dateTrunc']['unit']
+        self.since.append(start)
+        counts = {}
+        for moment in self.created:
+            if moment >= start:
+                bucket = bucket_start(moment, unit)
+                counts[bucket] = counts.get(bucket, 0) + 1
+        return [{'_id': bucket, 'count': count} for bucket, count in counts.items()]
+
+
+NOW = datetime(2024, 3, 14, 15, 30)  # a Thursday
+
+
+def test_bucket_start():
+    assert bucket_start(NOW) == datetime(2024, 3, 14)
+    assert bucket_start(NOW, 'week') == datetime(2024, 3, 11)
+
+
+def test_daily_window_fills_empty_days():
+    enquiries = Enquiries([NOW, NOW - timedelta(hours=1), NOW - timedelta(days=2),
+                           NOW - timedelta(days=40)])
+    trend = EnquiryTrend(enquiries).window(size=4, now=NOW)
+    assert trend == [
+        {'date': '2024-03-11', 'count': 0},
+        {'date': '2024-03-12', 'count': 1},
+        {'date': '2024-03-13', 'count': 0},
+        {'date': '2024-03-14', 'count': 2}
+    ]
+
+
+def test_weekly_window():
+    enquiries = Enquiries([NOW, NOW - timedelta(days=4), NOW - timedelta(days=8)])
+    trend = EnquiryTrend(enquiries).window(size=2, unit='week', now=NOW)
+    assert trend == [{'date': '2024-03-04', 'count': 2}, {'date': '2024-03-11', 'count': 1}]
+
+
+def test_closed_buckets_are_not_counted_again():
+    enquiries = Enquiries([NOW - timedelta(days=1), NOW])
+    trend = EnquiryTrend(enquiries)
+    trend.window(size=30, now=NOW)
+    assert enquiries.since[-1] == datetime(2024, 2, 14)
+
+    enquiries.created.append(NOW + timedelta(minutes=5))
+    again = trend.window(size=30, now=NOW + timedelta(minutes=10))
+    # Only the open bucket was aggregated the second time
+    assert enquiries.since[-1] == datetime(2024, 3, 14)
+    assert again[-1] == {'date': '2024-03-14', 'count': 2}
+    assert again[-2] == {'date': '2024-03-13', 'count': 1}
+
+
+def test_rolling_cache_is_bounded():
+    trend = EnquiryTrend(Enquiries([]), max_cached_buckets=10)
+    trend.window(size=30, now=NOW)
+    assert len(trend._closed['day']) == 10
+
+
+def test_unknown_unit():
+    with pytest.raises(ValueError):
+        EnquiryTrend(Enquiries([])).window(unit='month')
@@ -0,0 +1,45 @@
+# tests/test_events.py - Server-Sent Events fan-out
+import json
+from utils.events import Broadcaster, Subscriber, format_sse
+
+
+def test_slow_subscriber_only_gets_the_latest_value():
+    sub = Subscriber()
+    for value in (1, 2, 3):
+        sub.offer(value)
+    assert sub.wait(timeout=0) == 3
+    assert sub.skipped == 2
+    assert sub.wait(timeout=0.01) is None
+
+
+def test_publish_skips_repeats_and_respects_the_subscriber_limit():
+    hub = Broadcaster(max_subscribers=2)
+    first, second = hub.subscribe(), hub.subscribe()
+    assert hub.subscribe() is None
+
+    hub.publish({'enquiries': 1})
+    assert first.wait(timeout=0) == second.wait(timeout=0) == {'enquiries': 1}
+    hub.publish({'enquiries': 1})
+    assert first.wait(timeout=0) is None
+
+    hub.unsubscribe(second)
+    hub.publish({'enquiries': 2})
+    assert second.wait(timeout=0) is None
+    assert hub.subscriber_count == 1 and hub.subscribe() is not None
+
+
+def test_publish_from_skips_the_lookup_without_listeners():
+    hub = Broadcaster()
+    calls = []
+    hub.publish_from(lambda: calls.append(1) or 'stats')
+    assert calls == []
+    sub = hub.subscribe()
+    hub.publish_from(lambda: calls.append(1) or 'stats')
+    assert calls == [1] and sub.wait(timeout=0) == 'stats'
+
+
+def test_format_sse():
+    assert format_sse({'a': 1}) == 'data: {"a": 1}\n\n'
+    message = format_sse([1, 2], event='stats')
+    assert message.startswith('event: stats\ndata: ')
+    assert json.loads(message.split('data: ')[1]) == [1, 2]
@@ -0,0 +1,77 @@
+# tests/test_export.py - Streaming CSV / JSON Lines exports
+import csv
+import gzip
+import json
+from datetime import datetime
+from bson import ObjectId
+from utils import export
+from utils.export import (csv_cell, csv_chunks, jsonl_chunks, gzip_chunks, export_query,
+                          stream_export, ENQUIRY_FIELDS)
+from tests.fakes import FakeCollection
+
+FIELDS = ('_id', 'created_at', 'name', 'message', 'uploaded_files')
+
+
+def enquiry(n, **extra):
+    return dict({'_id': ObjectId(), 'created_at': datetime(2024, 1, 1, 12, n), 'status': 'new',
+                 'name': f'Buyer {n}', 'message': 'Need 4 pumps', 'uploaded_files': []}, **extra)
+
+
+def test_formula_cells_are_neutralised():
+    for value in ('=HYPERLINK("http://evil")', '+1+1', '-2', '@SUM(A1)', '\tx', '\rx'):
+        assert csv_cell(value) == "'" + value
+    assert csv_cell('Pump, 4 units') == 'Pump, 4 units'
+    assert csv_cell(-3.5) == -3.5
+    assert csv_cell(['a', 'b']) == 'a; b'
+    assert csv_cell(['=x']) == "'=x"
+
+
+def test_csv_rows():
+    doc = enquiry(1, message='=HYPERLINK("http://evil")', uploaded_files=['cas/a.pdf', 'cas/b.pdf'])
+    rows = list(csv.reader(''.join(csv_chunks([doc], FIELDS)).splitlines()))
+    assert rows[0] == list(FIELDS)
+    assert rows[1] == [str(doc['_id']), '2024-01-01T12:01:00', 'Buyer 1',
+                       '\'=HYPERLINK("http://evil")', 'cas/a.pdf; cas/b.pdf']
+
+
+def test_jsonl_keeps_values_unescaped():
+    doc = enquiry(1, message='=1+1')
+    line = json.loads(''.join(jsonl_chunks([doc], FIELDS)))
+    assert line['message'] == '=1+1'
+    assert line['_id'] == str(doc['_id'])
+
+
+def test_output_is_chunked(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_SIZE', 200)
+    docs = [enquiry(i % 60) for i in range(50)]
+    csv_parts = list(csv_chunks(docs, FIELDS))
+    jsonl_parts = list(jsonl_chunks(docs, FIELDS))
+    assert len(csv_parts) > 5 and len(jsonl_parts) > 5
+    assert len(''.join(jsonl_parts).splitlines()) == 50
+
+
+def test_gzip_round_trip():
+    chunks = ['a,b\n', '1,2\n' * 1000]
+    assert gzip.decompress(b''.join(gzip_chunks(iter(chunks)))).decode('utf-8') == ''.join(chunks)
+
+
+def test_export_query():
+    since, until = datetime(2024, 1, 1), datetime(2024, 2, 1)
+    assert export_query() == {}
+    assert export_query('stock_status', status='in_stock', since=since, until=until) == {
+        'stock_status': 'in_stock', 'created_at': {'$gte': since, '$lt': until}}
+
+
+def test_stream_export_orders_filters_and_closes_the_cursor():
+    docs = [enquiry(3), enquiry(1, status='closed'), enquiry(2)]
+    collection = FakeCollection(docs)
+    body = b''.join(stream_export(collection, {'status': 'new'}, ENQUIRY_FIELDS, fmt='jsonl'))
+    names = [json.loads(line)['name'] for line in body.decode('utf-8').splitlines()]
+    assert names == ['Buyer 2', 'Buyer 3']
+    assert collection.cursors[-1].closed
+
+
+def test_stream_export_gzip_csv():
+    collection = FakeCollection([enquiry(1)])
+    body = gzip.decompress(b''.join(stream_export(collection, {}, FIELDS, compress=True)))
+    assert body.decode('utf-8').splitlines()[0] == ','.join(FIELDS)
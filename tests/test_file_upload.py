@@ -0,0 +1,80 @@
+# tests/test_file_upload.py - Content-addressed uploads with reference counts
+import io
+import os
+from werkzeug.datastructures import FileStorage
+from utils.file_upload import UploadStore
+from tests.fakes import FakeCollection
+
+
+def upload(data, filename='Spec Sheet.pdf'):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def make_store(tmp_path, refs=None):
+    return UploadStore(str(tmp_path), refs or FakeCollection())
+
+
+def blobs(tmp_path):
+    return sorted(str(p.relative_to(tmp_path)) for p in tmp_path.rglob('*') if p.is_file())
+
+
+def test_identical_uploads_share_one_blob(tmp_path):
+    store = make_store(tmp_path)
+    first = store.save(upload(b'%PDF pump curve'))
+    second = store.save(upload(b'%PDF pump curve', 'copy.PDF'))
+    assert first == second and first.startswith('cas/') and first.endswith('.pdf')
+    assert blobs(tmp_path) == [first]
+    assert store.refs_collection.find_one({'_id': first})['refs'] == 2
+    assert store.refs_collection.find_one({'_id': first})['original_name'] == 'Spec_Sheet.pdf'
+
+
+def test_blob_is_removed_with_its_last_reference(tmp_path):
+    store = make_store(tmp_path)
+    path = store.save(upload(b'drawing'))
+    store.save(upload(b'drawing'))
+    store.release([path])
+    assert os.path.exists(tmp_path / path)
+    store.release([path, 'legacy_20240101_photo.jpg'])
+    assert blobs(tmp_path) == []
+    assert store.refs_collection.find_one({'_id': path}) is None
+
+
+def test_collect_garbage_sweeps_zero_references(tmp_path):
+    store = make_store(tmp_path)
+    path = store.save(upload(b'orphan'))
+    store.refs_collection.update_one({'_id': path}, {'$inc': {'refs': -1}})
+    assert store.collect_garbage() == 1
+    assert blobs(tmp_path) == []
+
+
+class RacingRefs(FakeCollection):
+    """Runs `during(self)` inside find_one_and_delete, before or after the delete"""
+
+    def __init__(self, after_delete):
+        super().__init__()
+        self.after_delete = after_delete
+        self.during = None
+
+    def find_one_and_delete(self, query):
+        during, self.during = self.during, None
+        if during and not self.after_delete:
+            during()
+        deleted = super().find_one_and_delete(query)
+        if during and self.after_delete:
+            during()
+        return deleted
+
+
+def test_reupload_racing_a_collection_keeps_its_blob(tmp_path):
+    for after_delete in (False, True):
+        refs = RacingRefs(after_delete)
+        store = make_store(tmp_path, refs)
+        path = store.save(upload(b'datasheet'))
+        saved = []
+        refs.during = lambda: saved.append(store.save(upload(b'datasheet')))
+        store.release([path])
+        assert saved == [path]
+        assert refs.find_one({'_id': path})['refs'] == 1
+        assert blobs(tmp_path) == [path]
+        store.release([path])
+        assert blobs(tmp_path) == []
@@ -0,0 +1,41 @@
+# tests/test_fragment_cache.py - {% cache %} tag for rendered template fragments
+from jinja2 import Environment
+from utils.cache import TTLCache
+from utils.fragment_cache import FragmentCache, FragmentCacheExtension
+
+TEMPLATE = ("<nav>{% cache 'nav-categories', none, 'catalog' %}"
+            "{% for name in menu() %}<a>{{ name }}</a>{% endfor %}{% endcache %}</nav>")
+
+
+def make_env(cache=True):
+    env = Environment(extensions=[FragmentCacheExtension])
+    if cache:
+        env.fragment_cache = FragmentCache(TTLCache())
+    calls = []
+    env.globals['menu'] = lambda: calls.append(1) or ['Pumps', 'Valves & Seals']
+    return env, calls
+
+
+def test_block_renders_once_until_its_tag_is_dropped():
+    env, calls = make_env()
+    template = env.from_string(TEMPLATE)
+    assert template.render() == '<nav><a>Pumps</a><a>Valves & Seals</a></nav>'
+    assert template.render() == template.render()
+    assert len(calls) == 1
+
+    env.fragment_cache.invalidate_tag('stats')
+    template.render()
+    assert len(calls) == 1
+    env.fragment_cache.invalidate_tag('catalog')
+    template.render()
+    assert len(calls) == 2
+    stats = env.fragment_cache.stats()
+    assert (stats['hits'], stats['misses']) == (3, 2)
+
+
+def test_renders_normally_without_a_cache():
+    env, calls = make_env(cache=False)
+    template = env.from_string(TEMPLATE)
+    template.render()
+    template.render()
+    assert len(calls) == 2
@@ -0,0 +1,95 @@
+# tests/test_http_cache.py - Cache-Control policies and conditional responses
+from datetime import datetime
+import pytest
+from flask import Flask, flash, abort
+from flask_login import LoginManager
+from utils.http_cache import conditional, cache_policy, policy_for
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    LoginManager(app).user_loader(lambda user_id: None)
+    app.state = {'version': 1, 'renders': 0}
+
+    def render():
+        app.state['renders'] += 1
+        return 'catalog page'
+
+    @app.route('/products')
+    @conditional(lambda: app.state['version'], build='b1')
+    def products():
+        return render()
+
+    @app.route('/product/<product_id>')
+    @conditional(lambda: app.state['version'],
+                 last_modified_func=lambda product_id: datetime(2024, 3, 1, 12, 0, 30, 999))
+    def product(product_id):
+        if product_id == 'gone':
+            abort(404)
+        return render()
+
+    @app.route('/flash')
+    def add_flash():
+        flash('Saved')
+        return ''
+
+    return app
+
+
+def test_matching_etag_skips_the_view(app):
+    client = app.test_client()
+    first = client.get('/products')
+    assert first.status_code == 200 and first.headers['ETag']
+    again = client.get('/products', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert app.state['renders'] == 1
+
+
+def test_etag_changes_with_version_and_path(app):
+    client = app.test_client()
+    etag = client.get('/products').headers['ETag']
+    assert client.get('/products?page=2').headers['ETag'] != etag
+    app.state['version'] = 2
+    response = client.get('/products', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_unknown_version_always_renders(app):
+    app.state['version'] = None
+    client = app.test_client()
+    response = client.get('/products', headers={'If-None-Match': '*'})
+    assert response.status_code == 200 and 'ETag' not in response.headers
+
+
+def test_if_modified_since(app):
+    client = app.test_client()
+    response = client.get('/product/1')
+    assert response.headers['Last-Modified'] == 'Fri, 01 Mar 2024 12:00:30 GMT'
+    assert client.get('/product/1', headers={
+        'If-Modified-Since': 'Fri, 01 Mar 2024 12:00:30 GMT'}).status_code == 304
+    assert client.get('/product/1', headers={
+        'If-Modified-Since': 'Fri, 01 Mar 2024 12:00:29 GMT'}).status_code == 200
+
+
+def test_errors_and_personalized_responses_get_no_etag(app):
+    client = app.test_client()
+    assert 'ETag' not in client.get('/product/gone').headers
+    client.get('/flash')
+    response = client.get('/products', headers={'If-None-Match': '*'})
+    assert response.status_code == 200 and 'ETag' not in response.headers
+
+
+def test_policy_for(app):
+    @cache_policy('catalog')
+    def view():
+        pass
+
+    with app.test_request_context('/products'):
+        assert policy_for(view, '/products') == 'catalog'
+        assert policy_for(None, '/about') == 'default'
+        assert policy_for(None, '/admin/products') == 'no-store'
+        flash('Saved')
+        assert policy_for(view, '/products') == 'private'
@@ -0,0 +1,32 @@
+# tests/test_images.py - Responsive image derivatives
+import io
+import os
+from functools import partial
+from werkzeug.datastructures import FileStorage
+from utils.file_upload import UploadStore
+from utils.images import remove_variants, DERIVED_DIR
+from tests.fakes import FakeCollection
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def test_remove_variants_only_touches_that_upload(tmp_path):
+    derived = tmp_path / DERIVED_DIR
+    for name in ('abc-320.webp', 'abc-640.jpg', 'abc-extra-320.jpg', 'abcd-320.jpg', 'abc.jpg'):
+        touch(str(derived / name))
+    assert remove_variants(str(tmp_path), 'cas/ab/abc.jpg') == 2
+    assert sorted(os.listdir(derived)) == ['abc-extra-320.jpg', 'abc.jpg', 'abcd-320.jpg']
+    assert remove_variants(str(tmp_path / 'missing'), 'cas/ab/abc.jpg') == 0
+
+
+def test_collecting_a_blob_removes_its_variants(tmp_path):
+    store = UploadStore(str(tmp_path), FakeCollection(),
+                        on_collect=partial(remove_variants, str(tmp_path)))
+    path = store.save(FileStorage(stream=io.BytesIO(b'photo'), filename='pump.jpg'))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    touch(str(tmp_path / DERIVED_DIR / f'{stem}-320.webp'))
+    store.release([path])
+    assert os.listdir(tmp_path / DERIVED_DIR) == []
@@ -0,0 +1,101 @@
+# tests/test_page_cache.py - Rendered-response cache for anonymous visitors
+import pytest
+from flask import Flask, flash, session, abort, request
+from flask_login import LoginManager, UserMixin, login_user
+from utils.cache import TTLCache
+from utils.page_cache import PageCache
+
+
+class User(UserMixin):
+    id = 'admin'
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    LoginManager(app).user_loader(lambda user_id: User())
+    app.renders = []
+    page_cache = PageCache(TTLCache(), locales=('en', 'de'))
+    app.page_cache = page_cache
+
+    @app.route('/product/<product_id>')
+    @page_cache.cached(query_args=('tab',))
+    def product(product_id):
+        app.renders.append(product_id)
+        if product_id == 'gone':
+            abort(404)
+        if request.args.get('cookie'):
+            response = app.make_response(f'product {product_id}')
+            response.set_cookie('seen', product_id)
+            return response
+        if request.args.get('remember'):
+            session['last_viewed'] = product_id
+        return f'product {product_id}'
+
+    @app.route('/login')
+    def login():
+        login_user(User())
+        return ''
+
+    @app.route('/flash')
+    def add_flash():
+        flash('Enquiry sent')
+        return ''
+
+    return app
+
+
+def test_anonymous_pages_are_served_from_the_cache(app):
+    client = app.test_client()
+    assert client.get('/product/1').headers['X-Page-Cache'] == 'MISS'
+    hit = client.get('/product/1')
+    assert hit.headers['X-Page-Cache'] == 'HIT' and hit.data == b'product 1'
+    assert app.renders == ['1']
+    client.get('/product/1?tab=specs')
+    client.get('/product/1', headers={'Accept-Language': 'de'})
+    client.get('/product/1?utm_source=mail')
+    assert app.renders == ['1', '1', '1']
+
+
+def test_logged_in_users_bypass_the_cache(app):
+    client = app.test_client()
+    client.get('/product/1')
+    client.get('/login')
+    response = client.get('/product/1')
+    assert 'X-Page-Cache' not in response.headers
+    assert app.renders == ['1', '1']
+
+
+def test_pending_flash_bypasses_the_cache(app):
+    client = app.test_client()
+    client.get('/product/1')
+    client.get('/flash')
+    response = client.get('/product/1')
+    assert 'X-Page-Cache' not in response.headers
+    assert b'product 1' in response.data and len(app.renders) == 2
+
+
+def test_responses_setting_cookies_or_session_are_not_stored(app):
+    client = app.test_client()
+    client.get('/product/1?cookie=1')
+    client.get('/product/1?cookie=1')
+    assert app.renders == ['1', '1']
+    client.get('/product/2?remember=1')
+    assert app.test_client().get('/product/2').headers['X-Page-Cache'] == 'MISS'
+
+
+def test_error_responses_are_not_cached(app):
+    client = app.test_client()
+    client.get('/product/gone')
+    client.get('/product/gone')
+    assert app.renders == ['gone', 'gone']
+
+
+def test_invalidate_by_view_args(app):
+    client = app.test_client()
+    client.get('/product/1')
+    client.get('/product/2')
+    app.page_cache.invalidate('product', product_id='1')
+    assert client.get('/product/1').headers['X-Page-Cache'] == 'MISS'
+    assert client.get('/product/2').headers['X-Page-Cache'] == 'HIT'
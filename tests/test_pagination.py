@@ -0,0 +1,105 @@
+# tests/test_pagination.py - Keyset and rank-position pagination
+from datetime import datetime, timedelta
+from bson import ObjectId
+from utils.pagination import keyset_page, rank_page, encode_cursor, decode_cursor, count_total
+from tests.fakes import FakeCollection
+
+START = datetime(2024, 1, 1)
+
+
+def make_docs(n, same_time_every=1):
+    return [{'_id': ObjectId(), 'created_at': START + timedelta(minutes=i // same_time_every),
+             'n': i} for i in range(n)]
+
+
+def walk(collection, per_page, **query):
+    seen, cursor = [], None
+    while True:
+        page = keyset_page(collection, query or None, per_page=per_page, after=cursor)
+        seen.extend(doc['n'] for doc in page.items)
+        if not page.has_next:
+            return seen
+        cursor = page.next_cursor
+
+
+def test_first_page_is_newest_first():
+    page = keyset_page(FakeCollection(make_docs(45)), per_page=20)
+    assert [d['n'] for d in page.items] == list(range(44, 24, -1))
+    assert page.has_next and not page.has_prev
+
+
+def test_walking_forward_visits_every_document_once():
+    assert walk(FakeCollection(make_docs(45)), per_page=20) == list(range(44, -1, -1))
+
+
+def test_ties_on_created_at_are_broken_by_id():
+    docs = make_docs(30, same_time_every=7)
+    assert sorted(walk(FakeCollection(docs), per_page=4)) == list(range(30))
+
+
+def test_stepping_back_returns_the_previous_page():
+    collection = FakeCollection(make_docs(45))
+    first = keyset_page(collection, per_page=20)
+    second = keyset_page(collection, per_page=20, after=first.next_cursor)
+    back = keyset_page(collection, per_page=20, before=second.prev_cursor)
+    assert [d['n'] for d in back.items] == [d['n'] for d in first.items]
+    assert not back.has_prev and back.has_next
+
+
+def test_filter_and_custom_field():
+    docs = [{'_id': ObjectId(), 'timestamp': START + timedelta(seconds=i),
+             'action': 'login' if i % 3 == 0 else 'logout'} for i in range(30)]
+    page = keyset_page(FakeCollection(docs), {'action': 'login'}, per_page=50, field='timestamp')
+    assert len(page.items) == 10
+    assert all(d['action'] == 'login' for d in page.items)
+
+
+def test_invalid_cursor_falls_back_to_the_first_page():
+    assert decode_cursor('not-a-cursor') is None
+    page = keyset_page(FakeCollection(make_docs(5)), per_page=2, after='not-a-cursor')
+    assert [d['n'] for d in page.items] == [4, 3]
+
+
+def test_cursor_round_trip():
+    doc = make_docs(1)[0]
+    assert decode_cursor(encode_cursor(doc)) == (doc['created_at'], doc['_id'])
+
+
+def test_count_total_estimates_only_when_unfiltered():
+    class Counting:
+        def estimated_document_count(self):
+            return 'estimate'
+
+        def count_documents(self, query, **kwargs):
+            return ('count', kwargs.get('limit'))
+
+    assert count_total(Counting()) == 'estimate'
+    assert count_total(Counting(), {'status': 'new'}, cap=100) == ('count', 100)
+
+
+def test_rank_page_keeps_the_ranking_and_reaches_every_match():
+    docs = make_docs(45)
+    ranked = [d['_id'] for d in sorted(docs, key=lambda d: d['n'] % 7)]
+    collection = FakeCollection(docs)
+
+    seen, cursor = [], None
+    while True:
+        page = rank_page(collection, ranked, per_page=20, after=cursor)
+        assert page.total == 45
+        seen.extend(d['_id'] for d in page.items)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == ranked
+
+    second = rank_page(collection, ranked, per_page=20, after='20')
+    back = rank_page(collection, ranked, per_page=20, before=second.prev_cursor)
+    assert [d['_id'] for d in back.items] == ranked[:20]
+    assert not back.has_prev
+
+
+def test_rank_page_skips_deleted_documents():
+    docs = make_docs(3)
+    ranked = [ObjectId()] + [d['_id'] for d in docs]
+    page = rank_page(FakeCollection(docs), ranked, per_page=10)
+    assert [d['_id'] for d in page.items] == ranked[1:]
@@ -0,0 +1,84 @@
+# tests/test_passwords.py - bcrypt on a bounded pool with load shedding
+import threading
+import time
+import bcrypt
+import pytest
+from utils import passwords
+from utils.passwords import PasswordHasher, LoginOverloaded, hash_rounds
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(rounds=4)
+    hashed = hasher.hash('pump-station-7')
+    assert hash_rounds(hashed) == 4
+    assert hasher.verify(hashed, 'pump-station-7')
+    assert not hasher.verify(hashed, 'pump-station-8')
+    assert not hasher.verify(None, 'x') and not hasher.verify(hashed, '')
+    assert not hasher.verify('not-a-bcrypt-hash', 'pump-station-7')
+
+
+def test_passwords_over_72_bytes_are_truncated_like_older_bcrypt():
+    hasher = PasswordHasher(rounds=4)
+    long_password = 'ß' * 40 + 'tail'  # 84 bytes in UTF-8
+    hashed = hasher.hash(long_password)
+    assert hasher.verify(hashed, long_password)
+    assert hasher.verify(hashed, 'ß' * 36 + 'different tail')
+    # Hashes stored by bcrypt < 5 were made from the first 72 bytes
+    legacy = bcrypt.hashpw(long_password.encode('utf-8')[:72], bcrypt.gensalt(rounds=4))
+    assert hasher.verify(legacy.decode('utf-8'), long_password)
+
+
+def test_upgrade_rehashes_at_the_configured_cost():
+    old = PasswordHasher(rounds=4).hash('secret')
+    hasher = PasswordHasher(rounds=5)
+    saved = []
+    assert hasher.upgrade(old, 'secret', saved.append)
+    assert hash_rounds(saved[0]) == 5 and hasher.verify(saved[0], 'secret')
+    assert not hasher.upgrade(saved[0], 'secret', saved.append)
+    assert hasher.stats()['rehashed'] == 1
+
+
+@pytest.fixture
+def blocked_checkpw(monkeypatch):
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def checkpw(password, hashed):
+        started.release()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(passwords.bcrypt, 'checkpw', checkpw)
+    yield started, release
+    release.set()
+
+
+def test_excess_logins_are_shed_immediately(blocked_checkpw):
+    started, release = blocked_checkpw
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(hasher.verify('$2b$04$x', 'pw')))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    assert started.acquire(timeout=5)  # one running, one queued behind it
+    deadline = time.monotonic() + 5
+    while hasher.stats()['in_flight'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    with pytest.raises(LoginOverloaded):
+        hasher.verify('$2b$04$x', 'pw')
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    stats = hasher.stats()
+    assert results == [True, True]
+    assert (stats['rejected'], stats['completed'], stats['max_depth']) == (1, 2, 2)
+    assert stats['in_flight'] == 0
+
+
+def test_slow_verification_times_out(blocked_checkpw):
+    hasher = PasswordHasher(rounds=4, workers=1, timeout=0.05)
+    with pytest.raises(LoginOverloaded):
+        hasher.verify('$2b$04$x', 'pw')
+    assert hasher.stats()['timeouts'] == 1
@@ -0,0 +1,126 @@
+# tests/test_search.py - In-memory product search index
+import time
+from bson import ObjectId
+from utils.search import SearchIndex, tokenize, normalize, edit_distance, shadow_fields, admin_search_filter
+from tests.fakes import FakeCollection
+
+
+def product(name, part_number='', manufacturer='', description='', category_id='c1'):
+    return {'_id': ObjectId(), 'name': name, 'part_number': part_number,
+            'manufacturer': manufacturer, 'description': description, 'category_id': category_id}
+
+
+PUMP = product('Hydraulic Pump', 'HX-200B', 'Rexroth', 'Gear pump for excavators')
+VALVE = product('Relief Valve', 'RV-10', 'Bosch', 'Pressure relief valve, fits HX pump lines')
+FILTER = product('Oil Filter', 'OF-77', 'Rexroth', 'Spin-on filter', category_id='c2')
+
+
+def ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def make_index(*products):
+    return SearchIndex(FakeCollection(products or [PUMP, VALVE, FILTER]))
+
+
+def test_tokenize_part_numbers():
+    assert normalize('HX-200/B') == 'hx200b'
+    assert set(tokenize('HX-200B', part_number=True)) >= {'hx', '200b', 'hx200b', '200', 'b'}
+
+
+def test_edit_distance_counts_transpositions():
+    assert edit_distance('pump', 'pmup', 2) == 1
+    assert edit_distance('valve', 'filter', 1) == 2
+
+
+def test_part_number_ranks_above_description_mentions():
+    results = make_index().search('hx pump')
+    assert ids(results)[0] == str(PUMP['_id'])
+    assert str(VALVE['_id']) in ids(results)
+
+
+def test_compact_and_prefix_matches():
+    index = make_index()
+    assert ids(index.search('hx200b')) == [str(PUMP['_id'])]
+    assert ids(index.search('hydr')) == [str(PUMP['_id'])]
+
+
+def test_typos_are_tolerated():
+    assert ids(make_index().search('hydralic')) == [str(PUMP['_id'])]
+
+
+def test_category_filter_and_unlimited_results():
+    index = make_index()
+    assert ids(index.search('rexroth', category_id='c2')) == [str(FILTER['_id'])]
+    many = [product(f'Seal kit {i}') for i in range(80)]
+    assert len(make_index(*many).search('seal', limit=None)) == 80
+    assert len(make_index(*many).search('seal')) == 50
+
+
+def test_incremental_updates():
+    index = make_index()
+    index.search('pump')  # builds the index
+    bolt = product('Track Bolt', 'TB-1')
+    index.upsert(bolt)
+    assert ids(index.search('track')) == [str(bolt['_id'])]
+    index.upsert(dict(bolt, name='Track Shoe'))
+    assert ids(index.search('shoe')) == [str(bolt['_id'])]
+    assert index.search('bolt') == []
+    index.remove(bolt['_id'])
+    assert index.search('shoe') == []
+
+
+def test_refresh_rebuilds_in_the_background():
+    collection = FakeCollection([PUMP])
+    index = SearchIndex(collection)
+    assert ids(index.search('pump')) == [str(PUMP['_id'])]
+
+    collection.docs.append(product('Swing Motor', 'SM-5'))
+    index.refresh()
+    deadline = time.monotonic() + 5
+    while not index.search('swing') and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(index.search('swing')) == 1
+
+
+def test_admin_search_shadow_fields():
+    fields = shadow_fields({'name': 'Hydraulic Pump', 'part_number': 'HX-200B'})
+    assert list(fields) == ['search_terms']
+    assert {'hydraulicpump', 'pump', 'hx200b'} <= set(fields['search_terms'])
+    assert admin_search_filter('HX-2') == {'search_terms': {'$regex': '^hx2'}}
+    assert admin_search_filter('pump', fulltext=True) == {'$text': {'$search': 'pump'}}
+    assert admin_search_filter('--') == {}
+
+
+def test_refresh_during_a_rebuild_runs_another():
+    index = make_index()
+    index.search('pump')
+    rebuild, calls = index.rebuild, []
+
+    def rebuild_with_a_write():
+        calls.append(1)
+        if len(calls) == 1:
+            index.refresh()  # lands while this rebuild is running
+        rebuild()
+
+    index.rebuild = rebuild_with_a_write
+    index._dirty = index._rebuilding = True
+    index._rebuild_loop()
+    assert len(calls) == 2
+    assert not index._rebuilding
+    index.refresh()
+    deadline = time.monotonic() + 5
+    while len(calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 3
+
+
+def test_version_labels_the_loaded_snapshot():
+    versions = iter([3, 4])
+    index = SearchIndex(FakeCollection([PUMP]), version_func=lambda: next(versions))
+    index.search('pump')
+    assert index.version == 3
+    index.upsert(product('Track Bolt'))
+    assert index.version is None
+    index.rebuild()
+    assert index.version == 4
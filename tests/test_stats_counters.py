@@ -0,0 +1,70 @@
+# tests/test_stats_counters.py - Materialized dashboard counters
+from utils.stats_counters import StatsCounters, COUNTERS_ID
+from tests.fakes import FakeCollection
+
+
+class Enquiries(FakeCollection):
+    def aggregate(self, pipeline):
+        counts = {}
+        for doc in self.docs:
+            counts[doc['status']] = counts.get(doc['status'], 0) + 1
+        return [{'_id': status, 'count': count} for status, count in counts.items()]
+
+
+def make_counters(products=(), enquiries=(), **kwargs):
+    stats = FakeCollection()
+    counters = StatsCounters(stats, FakeCollection(products), FakeCollection([{'name': 'Pumps'}]),
+                             Enquiries(enquiries), **kwargs)
+    return counters, stats
+
+
+def test_first_read_seeds_from_the_collections():
+    counters, stats = make_counters(products=[{'stock_status': 'limited'}, {}],
+                                    enquiries=[{'status': 'new'}, {'status': 'closed'}])
+    figures = counters.read()
+    assert (figures['total_products'], figures['stock_low'], figures['total_categories']) == (2, 1, 1)
+    assert figures['new_enquiries'] == 1 and figures['total_enquiries'] == 2
+    assert stats.find_one({'_id': COUNTERS_ID})['reconciled_at']
+
+
+def test_write_paths_adjust_the_counters():
+    counters, stats = make_counters()
+    counters.read()
+    counters.product_added({'stock_status': 'limited'})
+    counters.enquiry_added()
+    counters.enquiry_status_changed('new', 'quoted')
+    figures = counters.read()
+    assert (figures['total_products'], figures['stock_low']) == (1, 1)
+    assert figures['enquiries_by_status']['quoted'] == 1 and figures['new_enquiries'] == 0
+
+
+def test_increment_during_reconcile_is_not_overwritten():
+    counters, stats = make_counters(products=[{}])
+    counters.reconcile()
+    compute = counters.compute
+    raced = []
+
+    def compute_while_a_product_is_added():
+        actual = compute()
+        if not raced:
+            raced.append(1)
+            counters.products_collection.insert_one({})
+            counters.product_added({})
+        return actual
+
+    counters.compute = compute_while_a_product_is_added
+    counters.reconcile()
+    assert counters.read()['total_products'] == 2
+
+
+def test_reconcile_reports_only_real_changes():
+    calls = []
+    counters, stats = make_counters(products=[{}], on_reconcile=lambda: calls.append(1))
+    counters.reconcile()
+    assert len(calls) == 1
+    counters.reconcile()
+    assert len(calls) == 1
+    stats.update_one({'_id': COUNTERS_ID}, {'$inc': {'total_products': 5}})
+    counters.reconcile()
+    assert len(calls) == 2
+    assert counters.read()['total_products'] == 1
@@ -0,0 +1,64 @@
+# tests/test_user_cache.py - Session users served from a short-TTL cache
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: app.py builds its singletons at import
+SCRIPT = """
+import json
+from bson import ObjectId
+import app
+
+bumps = []
+app.coherence.bump = bumps.append
+
+def login(client, role):
+    user_id = str(ObjectId())
+    app.user_cache.set(('user', user_id), app.AdminUser(
+        {'_id': ObjectId(user_id), 'username': 'ops', 'email': 'ops@example.com', 'role': role}))
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+    return user_id
+
+client = app.app.test_client()
+user_id = login(client, 'admin')
+logout = client.get('/admin/logout')
+after_logout = app.user_cache.get(('user', user_id))
+
+other = login(client, 'admin')
+app.user_cache.set(('user', 'someone-else'), 'cached')
+runner = app.app.test_cli_runner()
+one = runner.invoke(args=['invalidate-user-cache', other])
+kept = app.user_cache.get(('user', 'someone-else'))
+everyone = runner.invoke(args=['invalidate-user-cache'])
+
+print(json.dumps({
+    'logout_status': logout.status_code,
+    'cached_after_logout': after_logout is not None,
+    'cli_output': one.output + everyone.output,
+    'dropped_one': app.user_cache.get(('user', other)) is None,
+    'kept_others': kept == 'cached',
+    'cleared_all': app.user_cache.stats()['size'] == 0,
+    'bumps': bumps,
+}))
+"""
+
+
+def test_logout_and_out_of_band_changes_invalidate_every_worker():
+    env = dict(os.environ, MONGODB_URI='mongodb://192.0.2.1:27017/probe', CACHE_COHERENCE='off',
+               MONGO_SERVER_SELECTION_TIMEOUT_MS='500',
+               MAIL_QUEUE_WORKERS='0', STATS_RECONCILE_INTERVAL='0', ACTIVITY_LOG_FLUSH_INTERVAL='60')
+    env.pop('FLASK_CONFIG', None)
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    assert outcome['logout_status'] == 302
+    assert not outcome['cached_after_logout']
+    assert outcome['dropped_one'] and outcome['kept_others'] and outcome['cleared_all']
+    assert 'Cached session users dropped: all' in outcome['cli_output']
+    assert outcome['bumps'] == ['users', 'users', 'users']
@@ -0,0 +1,201 @@
+# utils/activity_log.py - Buffered, batched writer for admin activity logs
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class ActivitySink:
+    """
+    Takes activity records off the request path.
+
+    record() only appends to a bounded in-memory queue; a writer thread
+    per process flushes it with insert_many(ordered=False) once
+    `batch_size` records are waiting or `flush_interval` seconds after the
+    oldest one arrived. When the queue is full new records are dropped and
+    counted rather than blocking the request. Whatever is still buffered
+    is written by flush() at interpreter exit (graceful worker shutdown).
+    """
+
+    def __init__(self, collection, max_buffer=10000, batch_size=200, flush_interval=2.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._lock = threading.Lock()
+        self._writer_pid = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._closing = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def record(self, activity):
+        """Buffer one activity document; never blocks"""
+        self.ensure_writer()
+        try:
+            self._queue.put_nowait(activity)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f'Activity log buffer full, {dropped} record(s) dropped so far')
+
+    def ensure_writer(self):
+        """Start the writer thread (and the exit flush) once per process"""
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+        threading.Thread(target=self._run, name='activity-log-writer', daemon=True).start()
+        atexit.register(self.flush, close=True)
+
+    def _take_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._closing:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            self._idle.clear()
+            try:
+                self._write(self._take_batch(first))
+            finally:
+                self._idle.set()
+
+    def _write(self, batch):
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            written, failed = len(batch), 0
+        except BulkWriteError as e:
+            written = e.details.get('nInserted', 0)
+            failed = len(batch) - written
+            logger.error(f'Activity log batch partially failed: {failed} of {len(batch)} record(s)')
+        except PyMongoError as e:
+            written, failed = 0, len(batch)
+            logger.error(f'Could not write {len(batch)} activity log record(s): {e}')
+        with self._lock:
+            self.written += written
+            self.failed += failed
+            self.batches += 1
+
+    def flush(self, close=False):
+        """Write everything buffered right now, from the calling thread"""
+        if close:
+            # Let the writer finish the batch it is holding instead of losing it
+            self._closing = True
+            self._idle.wait(self.flush_interval + 1)
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'buffered': self._queue.qsize(),
+                'max_buffer': self._queue.maxsize,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches
+            }
+
+
+# ----- retention and browsing -----
+RETENTION_MODES = ('ttl', 'capped', 'none')
+TTL_INDEX_NAME = 'timestamp_ttl'
+
+# Actions written by log_activity(), for the admin filter
+ACTIONS = ('login', 'logout', 'add_product', 'edit_product', 'delete_product',
+           'add_category', 'edit_category', 'delete_category', 'update_enquiry_status')
+
+
+def ensure_retention(db, name, mode='none', days=180, capped_bytes=256 * 1024 * 1024):
+    """
+    Apply the configured retention to the activity collection and return a
+    one-line description of what was done.
+
+    'ttl' keeps a TTL index on timestamp (adjusted in place with collMod
+    when `days` changes); 'capped' creates the collection capped, or
+    converts an existing one, which rebuilds it and drops its secondary
+    indexes, so run ensure_indexes afterwards; 'none' keeps everything.
+    """
+    if mode not in RETENTION_MODES:
+        raise ValueError(f'Unknown activity log retention mode: {mode}')
+
+    exists = name in db.list_collection_names(filter={'name': name})
+    capped = exists and db[name].options().get('capped', False)
+
+    if mode == 'capped':
+        if capped:
+            return f'{name} is already capped'
+        if exists:
+            db.command('convertToCapped', name, size=capped_bytes)
+            return f'converted {name} to a capped collection of {capped_bytes} bytes'
+        db.create_collection(name, capped=True, size=capped_bytes)
+        return f'created {name} as a capped collection of {capped_bytes} bytes'
+
+    ttl_index = db[name].index_information().get(TTL_INDEX_NAME) if exists else None
+    if mode == 'none':
+        if capped:
+            return f'{name} is capped; keeping everything needs the collection to be migrated first'
+        if ttl_index:
+            db[name].drop_index(TTL_INDEX_NAME)
+            return f'dropped the TTL index on {name}'
+        return f'{name} keeps every record'
+
+    if capped:
+        return f'{name} is capped; TTL retention needs the collection to be migrated first'
+    seconds = int(days * 86400)
+    if ttl_index is None:
+        db[name].create_index([('timestamp', 1)], name=TTL_INDEX_NAME, expireAfterSeconds=seconds)
+        return f'created a {days}-day TTL index on {name}'
+    if ttl_index.get('expireAfterSeconds') != seconds:
+        db.command('collMod', name, index={'name': TTL_INDEX_NAME, 'expireAfterSeconds': seconds})
+        return f'changed the TTL on {name} to {days} days'
+    return f'{name} already expires records after {days} days'
+
+
+def activity_filter(action=None, user_id=None, since=None, until=None):
+    """
+    Mongo filter for the activity browser. Each combination is served by
+    one of the (action|user_id, timestamp, _id) or (timestamp, _id) indexes.
+    """
+    query = {}
+    if action:
+        query['action'] = action
+    if user_id:
+        query['user_id'] = user_id
+    if since or until:
+        query['timestamp'] = {}
+        if since:
+            query['timestamp']['$gte'] = since
+        if until:
+            query['timestamp']['$lt'] = until
+    return query
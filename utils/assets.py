@@ -0,0 +1,188 @@
+# utils/assets.py - Bundled, minified, fingerprinted and pre-compressed static assets
+import os
+import re
+import gzip
+import json
+import hashlib
+import mimetypes
+from flask import g, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are still built
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json')
+
+# Bundle name -> source files (relative to the static folder), in load order
+BUNDLES = {
+    'css/public.css': ['css/style.css', 'css/professional.css', 'css/admin.css'],
+    'js/public.js': ['js/main.js']
+}
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE = re.compile(r'\s+')
+_CSS_PUNCT = re.compile(r'\s*([{};,])\s*')
+
+
+def minify_css(text):
+    """Strip comments and collapse whitespace (leaves selectors and calc() intact)"""
+    text = _CSS_COMMENT.sub('', text)
+    text = _CSS_SPACE.sub(' ', text)
+    text = _CSS_PUNCT.sub(r'\1', text)
+    return text.replace(';}', '}').strip() + '\n'
+
+
+def minify_js(text):
+    """
+    Conservative line-level minification: trims indentation and drops blank
+    lines and whole-line // comments. Never rewrites code inside a line, so
+    strings, regex literals and ASI-dependent code are left untouched.
+    """
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def _minify(path, text):
+    if path.endswith('.css'):
+        return minify_css(text)
+    if path.endswith('.js') and not path.endswith('.min.js'):
+        return minify_js(text)
+    return text
+
+
+def _write_variants(path, data):
+    """Write path plus .gz (and .br when brotli is installed) siblings"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        # mtime=0 keeps the output byte-identical between builds
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(data)
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build_assets(static_folder, bundles=BUNDLES, sources=('css', 'js')):
+    """
+    Minify every CSS/JS file under `sources` plus the configured bundles
+    into static/dist/ with content-hashed names, pre-compress them and
+    write the logical-name -> hashed-name manifest. Returns the manifest.
+    """
+    outputs = {}
+    for directory in sources:
+        root_dir = os.path.join(static_folder, directory)
+        for root, _, files in os.walk(root_dir):
+            for name in sorted(files):
+                if name.endswith(('.css', '.js')):
+                    rel = os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+                    outputs[rel] = [rel]
+    outputs.update(bundles)
+
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for name, files in outputs.items():
+        parts = []
+        for rel in files:
+            with open(os.path.join(static_folder, rel), encoding='utf-8') as f:
+                parts.append(_minify(rel, f.read()))
+        data = '\n'.join(parts).encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        hashed = f'{DIST_DIR}/{stem}.{digest}{ext}'
+        target = os.path.join(static_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.exists(target):
+            _write_variants(target, data)
+        manifest[name] = hashed
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """
+    Maps logical static filenames to their fingerprinted build outputs.
+
+    Install with init_app(): url_for('static', filename='css/style.css')
+    then points at dist/css/style.<hash>.css once `flask build-assets` has
+    run, and the static view serves fingerprinted files with their
+    pre-compressed variant (br, then gzip, per Accept-Encoding) under the
+    'immutable' cache policy. Without a manifest everything falls back to
+    the plain source files, so development needs no build step.
+    """
+
+    def __init__(self, static_folder, enabled=True):
+        self.static_folder = static_folder
+        self.enabled = enabled
+        self.entries = {}
+        self.reload()
+
+    def reload(self):
+        self.entries = {}
+        if not self.enabled:
+            return
+        path = os.path.join(self.static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def init_app(self, app):
+        app.url_defaults(self.rewrite_url)
+        app.add_template_global(self.bundle_urls)
+        original = app.view_functions['static']
+
+        def static(filename):
+            if filename.startswith(DIST_DIR + '/'):
+                response = self.send_fingerprinted(filename)
+                if response is not None:
+                    return response
+            return original(filename=filename)
+        static.cache_policy = 'static'
+        app.view_functions['static'] = static
+
+    def rewrite_url(self, endpoint, values):
+        """url_defaults hook swapping a source filename for its hashed build"""
+        if endpoint == 'static' and self.entries:
+            hashed = self.entries.get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+
+    def bundle_urls(self, name, sources=None):
+        """URLs for a bundle: one hashed file when built, else its source files"""
+        if name in self.entries:
+            return [url_for('static', filename=name)]
+        return [url_for('static', filename=rel) for rel in (sources or BUNDLES[name])]
+
+    def send_fingerprinted(self, filename):
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        if filename.endswith(COMPRESSIBLE):
+            for name, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if name in request.accept_encodings and os.path.isfile(path + suffix):
+                    encoding, filename = name, filename + suffix
+                    break
+        response = send_from_directory(self.static_folder, filename, mimetype=mimetype,
+                                       max_age=31536000)
+        if encoding:
+            response.content_encoding = encoding
+            del response.headers['Content-Disposition']  # would name the .gz/.br file
+        response.vary.add('Accept-Encoding')
+        g.cache_policy = 'immutable'
+        return response
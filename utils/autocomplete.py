@@ -0,0 +1,102 @@
+# utils/autocomplete.py - Sorted-prefix typeahead over part numbers, names and manufacturers
+import threading
+from bisect import bisect_left
+from utils.search import normalize
+
+
+class Autocomplete:
+    """
+    Typeahead lookups with bisect over a sorted array of normalized keys.
+
+    Every product contributes its part number, its name (from each word
+    onwards, so "pu" finds "Hydraulic Pump") and its manufacturer. A
+    lookup is one bisect plus a short forward scan, well under a
+    millisecond for catalogs of tens of thousands of products. refresh()
+    rebuilds the arrays on a background thread and swaps them in, so
+    queries keep being served from the previous snapshot meanwhile.
+    `version` is what version_func() returned when that snapshot started
+    loading, for ETags.
+    """
+
+    def __init__(self, products_collection, version_func=None):
+        self.products_collection = products_collection
+        self.version_func = version_func
+        self.version = None
+        self._keys = []
+        self._entries = []
+        self._built = False
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._dirty = False
+
+    def _build(self):
+        rows = []
+        projection = {'name': 1, 'part_number': 1, 'manufacturer': 1}
+        for product in self.products_collection.find({}, projection):
+            entry = (str(product['_id']), product.get('part_number', ''), product.get('name', ''))
+            part = normalize(product.get('part_number'))
+            if part:
+                rows.append((part, 'part', entry))
+            words = (product.get('name') or '').split()
+            for i in range(len(words)):
+                key = normalize(' '.join(words[i:]))
+                if key:
+                    rows.append((key, 'name', entry))
+            maker = normalize(product.get('manufacturer'))
+            if maker:
+                rows.append((maker, 'manufacturer', entry))
+        rows.sort(key=lambda row: row[0])
+        return [row[0] for row in rows], [(kind, entry) for _, kind, entry in rows]
+
+    def rebuild(self):
+        """Rebuild synchronously and swap the new snapshot in"""
+        version = self.version_func() if self.version_func else None
+        keys, entries = self._build()
+        with self._lock:
+            self._keys, self._entries = keys, entries
+            self._built = True
+            self.version = version
+
+    def refresh(self):
+        """Schedule a background rebuild (coalesces bursts of writes)"""
+        with self._lock:
+            self._dirty = True
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_loop, name='autocomplete-refresh', daemon=True).start()
+
+    def _rebuild_loop(self):
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    # Same critical section as refresh()'s check, so a refresh
+                    # from here on starts a new loop instead of being dropped
+                    self._rebuilding = False
+                    return
+                self._dirty = False
+            try:
+                self.rebuild()
+            except BaseException:
+                with self._lock:
+                    self._rebuilding = False
+                raise
+
+    def suggest(self, text, limit=8):
+        """Return up to `limit` compact suggestions for a typed prefix"""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        if not self._built:
+            self.rebuild()
+
+        keys, entries = self._keys, self._entries
+        results, seen = [], set()
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix) and len(results) < limit:
+            kind, (product_id, part_number, name) = entries[i]
+            if product_id not in seen:
+                seen.add(product_id)
+                results.append({'id': product_id, 'part': part_number, 'name': name, 'match': kind})
+            i += 1
+        return results
@@ -0,0 +1,42 @@
+# utils/category_counts.py - Shared per-category product counts
+import time
+import threading
+
+
+class CategoryCounts:
+    """
+    Product counts per category from a single $group aggregation,
+    cached for a short TTL and shared by every page that needs them
+    """
+
+    def __init__(self, products_collection, ttl=60):
+        self.products_collection = products_collection
+        self.ttl = ttl
+        self._counts = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def all(self):
+        """Return a {category_id: count} dict, refreshing it if expired"""
+        with self._lock:
+            if self._counts is None or (time.time() - self._loaded_at) >= self.ttl:
+                pipeline = [
+                    {'$group': {'_id': '$category_id', 'count': {'$sum': 1}}}
+                ]
+                self._counts = {
+                    str(row['_id']): row['count']
+                    for row in self.products_collection.aggregate(pipeline)
+                    if row['_id'] is not None
+                }
+                self._loaded_at = time.time()
+            return self._counts
+
+    def get(self, category_id):
+        """Return the product count for one category (0 if it has none)"""
+        return self.all().get(str(category_id), 0)
+
+    def invalidate(self):
+        """Drop the cached counts so the next read re-aggregates"""
+        with self._lock:
+            self._counts = None
+            self._loaded_at = 0
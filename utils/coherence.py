@@ -0,0 +1,135 @@
+# utils/coherence.py - Cross-worker cache invalidation via version stamps
+import os
+import time
+import logging
+import threading
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+MODES = ('auto', 'stream', 'poll', 'off')
+
+
+class CacheCoherence:
+    """
+    Keep per-process caches in step across gunicorn workers.
+
+    Every cache scope ('catalog', 'stats', ...) has a version document in
+    a small Mongo collection. Writers bump the version; each worker runs
+    the callbacks registered for a scope when it sees the version move.
+
+    Versions are observed through a change-stream listener thread when the
+    deployment supports it (replica set / Atlas). On a standalone mongod
+    the listener fails fast and the worker falls back to polling the
+    version documents at most every `check_interval` seconds. With mode
+    'off', or if even polling fails, caches simply fall back to their TTLs.
+    """
+
+    def __init__(self, versions_collection, mode='auto', check_interval=2.0):
+        if mode not in MODES:
+            raise ValueError(f'Unknown cache coherence mode: {mode}')
+        self.versions_collection = versions_collection
+        self.mode = mode
+        self.check_interval = check_interval
+        self._callbacks = {}
+        self._versions = {}
+        self._last_check = 0
+        self._lock = threading.Lock()
+        self._listener_pid = None
+        self._synced = False
+        self.streaming = False
+
+    def register(self, scope, callback):
+        """Run callback() in this worker whenever scope's version changes"""
+        self._callbacks.setdefault(scope, []).append(callback)
+
+    def bump(self, scope):
+        """Record a write to scope so every other worker invalidates it"""
+        if self.mode == 'off':
+            return
+        try:
+            doc = self.versions_collection.find_one_and_update(
+                {'_id': scope},
+                {'$inc': {'version': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except PyMongoError as e:
+            logger.warning(f'Could not bump cache version for {scope}: {e}')
+            return
+        with self._lock:
+            # The writer already invalidated what it touched; only skip the
+            # full flush if nobody else wrote in between
+            if self._versions.get(scope, 0) + 1 == doc['version']:
+                self._versions[scope] = doc['version']
+
+    def version(self, scope):
+        """
+        Last version of scope seen by this worker, or None if versions are
+        not being tracked (mode 'off', or Mongo unreachable so far)
+        """
+        if not self._synced:
+            return None
+        return self._versions.get(scope, 0)
+
+    def _apply(self, versions):
+        """Compare observed versions with ours and fire stale callbacks"""
+        stale = []
+        with self._lock:
+            # Once synced, a scope with no document yet was at version 0
+            default = 0 if self._synced else None
+            self._synced = True
+            for scope, version in versions.items():
+                known = self._versions.get(scope, default)
+                self._versions[scope] = version
+                if known is not None and known != version:
+                    stale.append(scope)
+        for scope in stale:
+            for callback in self._callbacks.get(scope, []):
+                callback()
+
+    def check(self, force=False):
+        """Poll version stamps; cheap enough to call on every request"""
+        if self.mode == 'off':
+            return
+        self.ensure_listener()
+        if self.streaming and not force:
+            return
+
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        try:
+            versions = {doc['_id']: doc.get('version', 0)
+                        for doc in self.versions_collection.find({})}
+        except PyMongoError as e:
+            logger.warning(f'Cache version check failed, relying on TTLs: {e}')
+            return
+        self._apply(versions)
+
+    def ensure_listener(self):
+        """Start the change-stream thread once per worker process"""
+        if self.mode not in ('auto', 'stream') or self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        self.streaming = False
+        thread = threading.Thread(target=self._listen, name='cache-coherence', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        try:
+            with self.versions_collection.watch(full_document='updateLookup') as stream:
+                self.streaming = True
+                # Catch anything that changed before the stream opened
+                self.check(force=True)
+                for change in stream:
+                    doc = change.get('fullDocument')
+                    if doc:
+                        self._apply({doc['_id']: doc.get('version', 0)})
+        except PyMongoError as e:
+            logger.info(f'Change streams unavailable, polling cache versions instead: {e}')
+        finally:
+            self.streaming = False
@@ -0,0 +1,240 @@
+# utils/db.py - Lazily connected MongoDB handles and declared indexes
+import os
+import time
+import logging
+import threading
+from pymongo import MongoClient, WriteConcern
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import (Primary, PrimaryPreferred, Secondary,
+                                      SecondaryPreferred, Nearest)
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest
+}
+
+# Used when a handle reads from secondaries but MONGO_MAX_STALENESS_SECONDS
+# is unset (the smallest value pymongo accepts)
+DEFAULT_MAX_STALENESS = 90
+# Heartbeat interval plus the primary's idle no-op write interval, the
+# slack in how pymongo estimates a secondary's staleness
+STALENESS_MARGIN = 20
+
+# config key -> MongoClient keyword (unset/None values are left to pymongo)
+CLIENT_SETTINGS = {
+    'MONGO_MAX_POOL_SIZE': 'maxPoolSize',
+    'MONGO_MIN_POOL_SIZE': 'minPoolSize',
+    'MONGO_MAX_IDLE_TIME_MS': 'maxIdleTimeMS',
+    'MONGO_WAIT_QUEUE_TIMEOUT_MS': 'waitQueueTimeoutMS',
+    'MONGO_SERVER_SELECTION_TIMEOUT_MS': 'serverSelectionTimeoutMS',
+    'MONGO_CONNECT_TIMEOUT_MS': 'connectTimeoutMS',
+    'MONGO_SOCKET_TIMEOUT_MS': 'socketTimeoutMS',
+    'MONGO_TLS': 'tls',
+    'MONGO_RETRY_WRITES': 'retryWrites',
+    'MONGO_WRITE_CONCERN': 'w',
+    'MONGO_REPLICA_SET': 'replicaSet'
+}
+
+
+def client_options(config):
+    """MongoClient keyword arguments from MONGO_* config settings"""
+    options = {kwarg: config[key] for key, kwarg in CLIENT_SETTINGS.items()
+               if config.get(key) is not None}
+    if options.get('tls'):
+        options['tlsAllowInvalidCertificates'] = False
+    return options
+
+
+def read_preference(mode, max_staleness=None):
+    """pymongo read preference object for a mode name like 'secondaryPreferred'"""
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f'Unknown read preference: {mode}')
+    if mode == 'primary':
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness or -1)
+
+
+class MongoConnection:
+    """
+    One MongoClient per process, created on first use instead of at import.
+
+    Importing the app therefore needs no reachable database, and a client
+    built before a fork (gunicorn --preload) is replaced in each worker.
+    init_app() reads MONGO_URI, MONGO_DBNAME and the MONGO_* pool and
+    timeout settings, so an application factory can repoint the
+    connection before first use.
+
+    Handles can be routed: collection(name, profile) looks the profile up
+    in MONGO_READ_PREFERENCES / MONGO_WRITE_CONCERNS, so e.g. public
+    catalog reads ('catalog') may go to secondaries while enquiries keep
+    majority writes, all over the same connection pool.
+
+    Reads that end up cached (or behind an ETag stamped with the current
+    data version) must not come from a secondary that hasn't seen the
+    latest write yet. read_primary(profile) therefore sends the profile's
+    reads to the primary for one staleness window (max staleness plus
+    STALENESS_MARGIN); call it whenever the data behind the profile
+    changes. A new process starts inside such a window for every profile,
+    because writes just before it started may not have replicated yet.
+    After the window, any eligible secondary has applied the write.
+    """
+
+    def __init__(self, uri=None, db_name='mumbai_tech', **options):
+        self.uri = uri
+        self.db_name = db_name
+        self.options = options
+        self.read_preferences = {}
+        self.write_concerns = {}
+        self.max_staleness = None
+        self._primary_until = {}
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.close()
+        self.uri = app.config['MONGO_URI']
+        self.db_name = app.config.get('MONGO_DBNAME', self.db_name)
+        self.options = client_options(app.config)
+        self.read_preferences = dict(app.config.get('MONGO_READ_PREFERENCES') or {})
+        self.write_concerns = dict(app.config.get('MONGO_WRITE_CONCERNS') or {})
+        self.max_staleness = app.config.get('MONGO_MAX_STALENESS_SECONDS')
+        for mode in self.read_preferences.values():
+            read_preference(mode)  # fail at startup on a typo, not on first query
+        if self.max_staleness is None and any(mode != 'primary' for mode in self.read_preferences.values()):
+            # Without a bound, read_primary() couldn't know when secondaries caught up
+            self.max_staleness = DEFAULT_MAX_STALENESS
+        app.extensions['mongo'] = self
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = MongoClient(self.uri, **self.options)
+                    self._pid = os.getpid()
+                    self._primary_until = {'*': time.monotonic() + self.staleness_window}
+        return self._client
+
+    @property
+    def db(self):
+        return self.client[self.db_name]
+
+    @property
+    def connected(self):
+        return self._client is not None and self._pid == os.getpid()
+
+    @property
+    def staleness_window(self):
+        """Seconds after a write until every selectable secondary has it"""
+        return (self.max_staleness or DEFAULT_MAX_STALENESS) + STALENESS_MARGIN
+
+    def read_primary(self, profile):
+        """Route profile's reads to the primary until secondaries caught up with a write"""
+        self._primary_until[profile] = time.monotonic() + self.staleness_window
+
+    def pinned(self, profile):
+        """True while profile's reads must go to the primary"""
+        now = time.monotonic()
+        return any(now < self._primary_until.get(key, 0) for key in (profile, '*'))
+
+    def collection(self, name, profile=None):
+        """Lazy handle on db[name], routed by profile (defaults to the name)"""
+        return LazyCollection(self, name, profile or name)
+
+    def get_collection(self, name, profile=None, primary=False):
+        """pymongo Collection with the read preference / write concern of profile"""
+        profile = profile or name
+        options = {}
+        mode = self.read_preferences.get(profile)
+        if mode and not primary:
+            options['read_preference'] = read_preference(mode, self.max_staleness)
+        w = self.write_concerns.get(profile)
+        if w is not None:
+            options['write_concern'] = WriteConcern(w=w)
+        return self.db.get_collection(name, **options)
+
+    def describe(self):
+        """Pool settings, routing and the servers currently known to the client"""
+        topology = self.client.topology_description
+        return {
+            'database': self.db_name,
+            'options': {k: v for k, v in self.options.items() if k != 'tlsAllowInvalidCertificates'},
+            'read_preferences': self.read_preferences,
+            'write_concerns': self.write_concerns,
+            'max_staleness': self.max_staleness,
+            'reading_primary': sorted(p for p in self.read_preferences if self.pinned(p)),
+            'topology': topology.topology_type_name,
+            'servers': {f'{host}:{port}': server.server_type_name
+                        for (host, port), server in topology.server_descriptions().items()}
+        }
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+
+class LazyCollection:
+    """
+    Stand-in for a pymongo Collection that connects on first attribute use
+    and follows the connection's read_primary() windows
+    """
+
+    def __init__(self, connection, name, profile=None):
+        self.connection = connection
+        self.name = name
+        self.profile = profile or name
+        self._client = None
+        self._collection = None
+        self._primary = None
+
+    @property
+    def collection(self):
+        client = self.connection.client
+        if self._client is not client:
+            self._collection = self.connection.get_collection(self.name, self.profile)
+            self._primary = self.connection.get_collection(self.name, self.profile, primary=True)
+            self._client = client
+        if self.connection.pinned(self.profile):
+            return self._primary
+        return self._collection
+
+    def __getattr__(self, attr):
+        return getattr(self.collection, attr)
+
+    def __repr__(self):
+        return f'LazyCollection({self.connection.db_name}.{self.name}, profile={self.profile!r})'
+
+
+def ensure_indexes(connection, declared):
+    """
+    Create every declared index that is missing. Safe to run repeatedly:
+    identical indexes are left alone, and one that conflicts with an
+    existing index of different options is reported instead of aborting.
+
+    declared maps collection name -> list of pymongo IndexModel.
+    Returns {collection: {'created': [...], 'existing': [...], 'failed': [...]}}.
+    """
+    report = {}
+    for name, models in declared.items():
+        collection = connection.db[name]
+        existing = set(collection.index_information())
+        result = {'created': [], 'existing': [], 'failed': []}
+        for model in models:
+            try:
+                index_name = collection.create_indexes([model])[0]
+            except OperationFailure as e:
+                logger.error(f'Could not create index {model.document} on {name}: {e}')
+                result['failed'].append(model.document['name'])
+                continue
+            result['existing' if index_name in existing else 'created'].append(index_name)
+        report[name] = result
+    return report
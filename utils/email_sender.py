@@ -0,0 +1,163 @@
+# utils/email_sender.py - Durable outbound email queue
+import os
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask_mail import Message
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class EmailQueue:
+    """
+    Outbound email jobs persisted in a Mongo collection.
+
+    Each job holds one or more message specs (subject, sender, recipients,
+    body, attachments as {'path', 'filename'} under the upload folder). A
+    fixed pool of worker threads claims pending jobs in batches and sends
+    each batch over a single SMTP connection from mail.connect(). Failed
+    jobs are retried with exponential backoff until max_attempts, and jobs
+    left 'sending' by a worker that died are handed back out after
+    lease_seconds, so nothing queued is lost across restarts.
+    """
+
+    def __init__(self, jobs_collection, mail, app, workers=2, batch_size=20,
+                 max_attempts=5, backoff_seconds=30, lease_seconds=300,
+                 poll_interval=5):
+        self.jobs_collection = jobs_collection
+        self.mail = mail
+        self.app = app
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._workers_pid = None
+
+    # ----- producers -----
+    def enqueue(self, messages, reference=None):
+        """Persist a job made of message specs and wake a worker"""
+        now = datetime.utcnow()
+        job = {
+            'messages': messages,
+            'reference': reference,
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now
+        }
+        result = self.jobs_collection.insert_one(job)
+        self._wakeup.set()
+        return result.inserted_id
+
+    # ----- consumers -----
+    def _claim(self):
+        """Atomically take one due job, including expired 'sending' leases"""
+        now = datetime.utcnow()
+        return self.jobs_collection.find_one_and_update(
+            {'$or': [
+                {'status': 'pending', 'next_attempt_at': {'$lte': now}},
+                {'status': 'sending', 'locked_at': {'$lt': now - timedelta(seconds=self.lease_seconds)}}
+            ]},
+            {'$set': {'status': 'sending', 'locked_at': now, 'locked_by': os.getpid()}},
+            sort=[('next_attempt_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _build(self, spec, upload_folder):
+        msg = Message(subject=spec['subject'],
+                      recipients=spec['recipients'],
+                      sender=spec.get('sender'),
+                      body=spec.get('body'))
+        for attachment in spec.get('attachments', []):
+            if isinstance(attachment, str):
+                # Jobs queued before attachments carried their original name
+                attachment = {'path': attachment, 'filename': os.path.basename(attachment)}
+            file_path = os.path.join(upload_folder, attachment['path'])
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as fp:
+                    msg.attach(attachment['filename'], 'application/octet-stream', fp.read())
+        return msg
+
+    def _fail(self, job, error):
+        attempts = job.get('attempts', 0) + 1
+        update = {'attempts': attempts, 'last_error': str(error)}
+        if attempts >= self.max_attempts:
+            update['status'] = 'failed'
+            logger.error(f"Email job {job['_id']} failed permanently: {error}")
+        else:
+            update['status'] = 'pending'
+            update['next_attempt_at'] = datetime.utcnow() + timedelta(
+                seconds=self.backoff_seconds * 2 ** (attempts - 1))
+            logger.warning(f"Email job {job['_id']} failed (attempt {attempts}), will retry: {error}")
+        self.jobs_collection.update_one({'_id': job['_id']}, {'$set': update})
+
+    def process_batch(self):
+        """Send up to batch_size due jobs over one SMTP connection"""
+        jobs = []
+        while len(jobs) < self.batch_size:
+            job = self._claim()
+            if not job:
+                break
+            jobs.append(job)
+        if not jobs:
+            return 0
+
+        upload_folder = self.app.config['UPLOAD_FOLDER']
+        try:
+            with self.mail.connect() as conn:
+                for job in jobs:
+                    try:
+                        for spec in job['messages'][job.get('sent_messages', 0):]:
+                            conn.send(self._build(spec, upload_folder))
+                            # Remember progress so a retry doesn't resend
+                            self.jobs_collection.update_one({'_id': job['_id']},
+                                                            {'$inc': {'sent_messages': 1}})
+                            job['sent_messages'] = job.get('sent_messages', 0) + 1
+                        self.jobs_collection.update_one(
+                            {'_id': job['_id']},
+                            {'$set': {'status': 'sent', 'sent_at': datetime.utcnow()}})
+                        logger.info(f"Email job {job['_id']} sent ({job.get('reference')})")
+                    except Exception as e:
+                        self._fail(job, e)
+        except Exception as e:
+            # Could not open (or lost) the SMTP connection: retry the rest later
+            for job in jobs:
+                current = self.jobs_collection.find_one({'_id': job['_id']}, {'status': 1})
+                if current and current['status'] == 'sending':
+                    self._fail(job, e)
+        return len(jobs)
+
+    def drain(self):
+        """Process due jobs until none are left (CLI and tests)"""
+        total = 0
+        with self.app.app_context():
+            while True:
+                sent = self.process_batch()
+                if not sent:
+                    return total
+                total += sent
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    processed = self.process_batch()
+            except PyMongoError as e:
+                logger.error(f'Email worker could not reach the queue: {e}')
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def ensure_workers(self):
+        """Start the bounded worker pool once per process"""
+        if not self.workers or self._workers_pid == os.getpid():
+            return
+        self._workers_pid = os.getpid()
+        for i in range(self.workers):
+            threading.Thread(target=self._run, name=f'email-worker-{i}', daemon=True).start()
@@ -0,0 +1,85 @@
+# utils/enquiry_trend.py - Enquiry counts bucketed by day or week
+import threading
+from datetime import datetime, timedelta
+
+UNITS = ('day', 'week')
+
+
+def bucket_start(moment, unit='day'):
+    """Truncate a datetime to the start of its day or (Monday-based) week"""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def bucket_step(unit='day'):
+    return timedelta(weeks=1) if unit == 'week' else timedelta(days=1)
+
+
+class EnquiryTrend:
+    """
+    Build enquiry trend windows with a single $dateTrunc aggregation.
+
+    Buckets that have already closed (every day/week before the current
+    one) never change, so their counts are kept in a small rolling cache
+    and only the open bucket is re-counted on later calls.
+    """
+
+    def __init__(self, enquiries_collection, max_cached_buckets=400):
+        self.enquiries_collection = enquiries_collection
+        self.max_cached_buckets = max_cached_buckets
+        self._closed = {unit: {} for unit in UNITS}
+        self._lock = threading.Lock()
+
+    def _aggregate(self, start, unit):
+        """Count enquiries per bucket from start onwards in one round trip"""
+        trunc = {'date': '$created_at', 'unit': unit}
+        if unit == 'week':
+            trunc['startOfWeek'] = 'monday'
+        pipeline = [
+            {'$match': {'created_at': {'$gte': start}}},
+            {'$group': {'_id': {'$dateTrunc': trunc}, 'count': {'$sum': 1}}}
+        ]
+        return {row['_id']: row['count']
+                for row in self.enquiries_collection.aggregate(pipeline)}
+
+    def window(self, size=30, unit='day', now=None):
+        """
+        Return [{'date': 'YYYY-MM-DD', 'count': n}, ...] for the last
+        `size` buckets, oldest first, with empty buckets filled with 0
+        """
+        if unit not in UNITS:
+            raise ValueError(f'Unsupported trend unit: {unit}')
+
+        step = bucket_step(unit)
+        current = bucket_start(now or datetime.utcnow(), unit)
+        buckets = [current - step * i for i in range(size - 1, -1, -1)]
+        closed = buckets[:-1]
+
+        with self._lock:
+            cache = self._closed[unit]
+            missing = [b for b in closed if b not in cache]
+
+            # Only go back as far as the oldest bucket we don't know yet
+            counts = self._aggregate(missing[0] if missing else current, unit)
+
+            for b in missing:
+                cache[b] = counts.get(b, 0)
+
+            # Keep the rolling cache bounded to the most recent buckets
+            if len(cache) > self.max_cached_buckets:
+                for b in sorted(cache)[:len(cache) - self.max_cached_buckets]:
+                    del cache[b]
+
+            trend = [{'date': b.strftime('%Y-%m-%d'), 'count': cache.get(b, counts.get(b, 0))}
+                     for b in closed]
+
+        trend.append({'date': current.strftime('%Y-%m-%d'), 'count': counts.get(current, 0)})
+        return trend
+
+    def clear(self):
+        """Forget every cached closed bucket"""
+        with self._lock:
+            for unit in UNITS:
+                self._closed[unit].clear()
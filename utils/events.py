@@ -0,0 +1,90 @@
+# utils/events.py - In-process Server-Sent Events broadcaster
+import json
+import threading
+
+
+class Subscriber:
+    """
+    One connected client. Holds only the latest undelivered value, so a
+    slow client skips intermediate updates instead of queueing them up.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._pending = False
+        self.skipped = 0
+
+    def offer(self, value):
+        with self._cond:
+            if self._pending:
+                self.skipped += 1
+            self._value = value
+            self._pending = True
+            self._cond.notify()
+
+    def wait(self, timeout=None):
+        """Return the next value, or None if nothing arrived within timeout"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return None
+            self._pending = False
+            return self._value
+
+
+class Broadcaster:
+    """
+    Fan a single stream of values out to every connected subscriber.
+
+    Built on threading primitives so it works under threaded gunicorn
+    workers and, once monkey-patched, under gevent workers too.
+    """
+
+    def __init__(self, max_subscribers=100):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._last = None
+
+    def subscribe(self):
+        """Register a new client, or return None if the server is full"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            sub = Subscriber()
+            self._subscribers.add(sub)
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, value):
+        """Send value to every subscriber if it differs from the last one"""
+        with self._lock:
+            if value == self._last:
+                return
+            self._last = value
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.offer(value)
+
+    def publish_from(self, loader):
+        """Publish loader()'s result, skipping the lookup when nobody listens"""
+        if self.subscriber_count:
+            self.publish(loader())
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(data, event=None):
+    """Serialize one Server-Sent Events message"""
+    message = f'data: {json.dumps(data)}\n\n'
+    if event:
+        message = f'event: {event}\n{message}'
+    return message
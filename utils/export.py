@@ -0,0 +1,127 @@
+# utils/export.py - Streaming CSV / JSON Lines exports straight from a Mongo cursor
+import io
+import csv
+import json
+import zlib
+from datetime import datetime
+from bson import ObjectId
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson'
+}
+
+ENQUIRY_FIELDS = ('_id', 'created_at', 'status', 'name', 'email', 'phone', 'company',
+                  'country', 'industry', 'product_id', 'quantity', 'quantity_unit',
+                  'delivery_urgency', 'message')
+
+PRODUCT_FIELDS = ('_id', 'part_number', 'name', 'manufacturer', 'machine_type',
+                  'category_id', 'price', 'stock_status', 'is_featured',
+                  'created_at', 'updated_at')
+
+# Roughly how much text to collect before handing a chunk to the server
+CHUNK_SIZE = 64 * 1024
+
+# Leading characters that make spreadsheet apps treat a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _plain(value):
+    """Make a Mongo value JSON/CSV friendly"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def export_query(status_field='status', status=None, since=None, until=None):
+    """Filter on a status field and a [since, until) created_at range"""
+    query = {}
+    if status:
+        query[status_field] = status
+    if since or until:
+        query['created_at'] = {}
+        if since:
+            query['created_at']['$gte'] = since
+        if until:
+            query['created_at']['$lt'] = until
+    return query
+
+
+def iter_documents(collection, query, fields, batch_size=500):
+    """
+    Walk the matching documents in (created_at, _id) order with a fixed
+    projection; only one cursor batch is held in memory at a time
+    """
+    projection = {field: 1 for field in fields}
+    cursor = (collection.find(query, projection)
+              .sort([('created_at', 1), ('_id', 1)])
+              .batch_size(batch_size))
+    try:
+        for doc in cursor:
+            yield doc
+    finally:
+        # Runs when the client disconnects mid-download, too
+        cursor.close()
+
+
+def csv_cell(value):
+    """
+    A CSV cell for a plain value. Strings that a spreadsheet would run as
+    a formula (enquiry text is public input) get a leading apostrophe.
+    """
+    if isinstance(value, list):
+        value = '; '.join(map(str, value))
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(docs, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for doc in docs:
+        writer.writerow([csv_cell(_plain(doc.get(field))) for field in fields])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(docs, fields):
+    lines = []
+    size = 0
+    for doc in docs:
+        line = json.dumps({field: _plain(doc.get(field)) for field in fields},
+                          ensure_ascii=False, default=str)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines, size = [], 0
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of text chunks into one gzip stream on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(collection, query, fields, fmt='csv', batch_size=500, compress=False):
+    """Generator of response body chunks for an export in `fmt` (see FORMATS)"""
+    docs = iter_documents(collection, query, fields, batch_size)
+    chunks = csv_chunks(docs, fields) if fmt == 'csv' else jsonl_chunks(docs, fields)
+    if compress:
+        return gzip_chunks(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
@@ -0,0 +1,124 @@
+# utils/file_upload.py - Content-addressed upload storage with reference counts
+import os
+import uuid
+import hashlib
+import logging
+from datetime import datetime
+from werkzeug.utils import secure_filename
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+BLOB_DIR = 'cas'
+
+
+class UploadStore:
+    """
+    Store uploads under their SHA-256 so identical files are kept once.
+
+    Files are streamed to a temporary file in chunks while being hashed,
+    then moved over cas/<aa>/<sha256>.<ext> below the upload folder (an
+    existing blob has the same bytes, so replacing it is harmless). Every
+    product or enquiry that points at a blob holds a reference in the
+    refs collection, and a blob is deleted once its last reference goes.
+    The returned path is relative to the upload folder, so templates keep
+    using url_for('static', filename='uploads/' + path).
+    on_collect(path) runs after a blob is deleted, to drop files derived
+    from it.
+    """
+
+    def __init__(self, upload_folder, refs_collection, on_collect=None):
+        self.upload_folder = upload_folder
+        self.refs_collection = refs_collection
+        self.on_collect = on_collect
+
+    def _path(self, relative):
+        return os.path.join(self.upload_folder, relative)
+
+    def save(self, file):
+        """Stream an uploaded FileStorage into the store and return its path"""
+        if not file or not file.filename:
+            return None
+
+        filename = secure_filename(file.filename)
+        ext = os.path.splitext(filename)[1].lower()
+        tmp_path = self._path(f'.upload-{uuid.uuid4().hex}.tmp')
+        digest = hashlib.sha256()
+        size = 0
+
+        os.makedirs(self.upload_folder, exist_ok=True)
+        try:
+            with open(tmp_path, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            sha = digest.hexdigest()
+            relative = f'{BLOB_DIR}/{sha[:2]}/{sha}{ext}'
+
+            # Take the reference before placing the blob so a concurrent
+            # garbage collection can't remove it underneath us
+            self.refs_collection.update_one(
+                {'_id': relative},
+                {'$inc': {'refs': 1},
+                 '$setOnInsert': {'size': size, 'original_name': filename,
+                                  'created_at': datetime.utcnow()}},
+                upsert=True
+            )
+
+            # Always put our copy in place: a collection racing with us may
+            # have just moved the old blob aside
+            target = self._path(relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+            return relative
+        except (OSError, PyMongoError) as e:
+            logger.error(f'Failed to save file: {e}')
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def release(self, paths):
+        """Drop one reference to each path, deleting blobs nobody uses"""
+        for relative in paths or []:
+            # Legacy uploads (timestamped names) are not reference-counted
+            if not relative.startswith(BLOB_DIR + '/'):
+                continue
+            try:
+                self.refs_collection.update_one({'_id': relative}, {'$inc': {'refs': -1}})
+                self._collect(relative)
+            except PyMongoError as e:
+                logger.error(f'Failed to release upload {relative}: {e}')
+
+    def _collect(self, relative):
+        # Move the blob aside before dropping the ref document, so a save()
+        # that re-references it in between writes a fresh copy we never touch
+        target = self._path(relative)
+        tombstone = f'{target}.{uuid.uuid4().hex}.dead'
+        try:
+            os.replace(target, tombstone)
+        except FileNotFoundError:
+            tombstone = None
+
+        # Only the caller that removes the ref document deletes the file
+        if self.refs_collection.find_one_and_delete({'_id': relative, 'refs': {'$lte': 0}}):
+            if tombstone:
+                os.remove(tombstone)
+            if self.on_collect:
+                self.on_collect(relative)
+        elif tombstone:
+            # Referenced again (or collected by someone else): put it back
+            os.replace(tombstone, target)
+
+    def collect_garbage(self):
+        """Delete every blob whose reference count has dropped to zero"""
+        removed = 0
+        for doc in self.refs_collection.find({'refs': {'$lte': 0}}, {'_id': 1}):
+            self._collect(doc['_id'])
+            removed += 1
+        return removed
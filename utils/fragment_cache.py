@@ -0,0 +1,107 @@
+# utils/fragment_cache.py - {% cache %} tag for rendered template fragments
+import time
+import threading
+from flask import g, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """
+    Rendered HTML of expensive template blocks, shared by every template.
+
+    Entries live in a bounded TTLCache keyed on ('fragment', tag, key);
+    the tag (e.g. 'catalog') lets a write drop every fragment built from
+    that data with invalidate_tag(). Each entry remembers how long it
+    took to render, so a hit can report the render time it saved, both
+    per request (g.fragment_timing) and in the running totals of stats().
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.render_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def _record(self, hit, seconds):
+        with self._lock:
+            if hit:
+                self.saved_seconds += seconds
+            else:
+                self.render_seconds += seconds
+        if has_request_context():
+            timing = g.setdefault('fragment_timing', {'hits': 0, 'misses': 0, 'saved': 0.0})
+            if hit:
+                timing['hits'] += 1
+                timing['saved'] += seconds
+            else:
+                timing['misses'] += 1
+
+    def render(self, key, render_func, ttl=None, tag=None):
+        """Return the cached fragment for key, calling render_func() on a miss"""
+        cache_key = ('fragment', tag, key)
+        hit = self.store.get(cache_key)
+        if hit is not None:
+            html, seconds = hit
+            self._record(True, seconds)
+            return html
+
+        start = time.perf_counter()
+        html = Markup(render_func())
+        seconds = time.perf_counter() - start
+        self.store.set(cache_key, (html, seconds), ttl)
+        self._record(False, seconds)
+        return html
+
+    def invalidate_tag(self, tag):
+        self.store.invalidate_matching(lambda key: key[1] == tag)
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        stats = self.store.stats()
+        with self._lock:
+            stats['render_ms'] = round(self.render_seconds * 1000, 2)
+            stats['saved_ms'] = round(self.saved_seconds * 1000, 2)
+        return stats
+
+
+def server_timing(timing):
+    """Server-Timing header value for a request's fragment cache use"""
+    return (f'fragments;dur={timing["saved"] * 1000:.2f};'
+            f'desc="{timing["hits"]} hit, {timing["misses"]} miss (ms saved)"')
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache key[, ttl[, tag]] %} ... {% endcache %}
+
+    key is any expression (fold in whatever the block depends on, e.g.
+    'nav-' ~ request.endpoint); ttl falls back to the cache default and
+    tag groups fragments for invalidation. Blocks render normally when no
+    FragmentCache is attached to environment.fragment_cache.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while len(args) < 3 and parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        while len(args) < 3:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, tag, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.render(key, caller, ttl=ttl, tag=tag)
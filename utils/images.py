@@ -0,0 +1,193 @@
+# utils/images.py - Responsive image derivatives for product photos
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from bson import ObjectId
+from flask import url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow is optional; pages fall back to the original upload
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+DERIVED_DIR = 'derived'
+DEFAULT_WIDTHS = (320, 640, 1280)
+
+
+def variant_key(image):
+    """Mongo-safe key for an upload path inside product['image_variants']"""
+    return image.replace('.', '_').replace('/', '_')
+
+
+def modern_formats():
+    """Modern formats this Pillow build can encode, best first"""
+    if Image is None:
+        return []
+    return [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+
+
+def build_variants(upload_folder, image, widths=DEFAULT_WIDTHS):
+    """
+    Write resized copies of one upload in modern formats plus a JPEG/PNG
+    fallback. Runs in a worker process, so it only touches the filesystem.
+    """
+    src = os.path.join(upload_folder, image)
+    stem = os.path.splitext(os.path.basename(image))[0]
+    out_dir = os.path.join(upload_folder, DERIVED_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with Image.open(src) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+        fallback = 'png' if has_alpha else 'jpeg'
+        original = original.convert('RGBA' if has_alpha else 'RGB')
+
+        # Never upscale; the largest variant is at most the original width
+        sizes = sorted({min(w, original.width) for w in widths})
+        variants = {fmt: [] for fmt in modern_formats() + [fallback]}
+
+        for width in sizes:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.LANCZOS)
+            for fmt in variants:
+                ext = 'jpg' if fmt == 'jpeg' else fmt
+                name = f'{stem}-{width}.{ext}'
+                resized.save(os.path.join(out_dir, name), fmt.upper(), quality=80)
+                variants[fmt].append({'w': width, 'path': f'{DERIVED_DIR}/{name}'})
+
+    return {'width': original.width, 'height': original.height,
+            'fallback': fallback, 'variants': variants}
+
+
+def remove_variants(upload_folder, image):
+    """Delete the derivatives built from one upload"""
+    stem = os.path.splitext(os.path.basename(image))[0]
+    out_dir = os.path.join(upload_folder, DERIVED_DIR)
+    try:
+        entries = list(os.scandir(out_dir))
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for entry in entries:
+        name, _ = os.path.splitext(entry.name)
+        prefix, _, width = name.rpartition('-')
+        if prefix == stem and width.isdigit():
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+class ImagePipeline:
+    """
+    Generate derivatives in a process pool after an upload is saved and
+    record them on the product document as image_variants.<key>.
+    on_update(product_id) runs once per submit(), after its last image.
+    """
+
+    def __init__(self, upload_folder, products_collection, workers=2,
+                 widths=DEFAULT_WIDTHS, on_update=None):
+        self.upload_folder = upload_folder
+        self.products_collection = products_collection
+        self.workers = workers
+        self.widths = widths
+        self.on_update = on_update
+        self._executor = None
+        self._executor_pid = None
+
+    @property
+    def enabled(self):
+        return Image is not None and self.workers > 0
+
+    def _pool(self):
+        # One pool per worker process; spawn avoids forking Mongo client threads
+        if self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'))
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def submit(self, product_id, images):
+        """Queue derivative generation for a product's images"""
+        if not self.enabled:
+            return []
+        futures = []
+        images = list(images or [])
+        batch = {'pending': len(images), 'updated': False, 'lock': threading.Lock()}
+        for image in images:
+            future = self._pool().submit(build_variants, self.upload_folder, image, self.widths)
+            future.add_done_callback(partial(self._record, str(product_id), image, batch))
+            futures.append(future)
+        return futures
+
+    def _record(self, product_id, image, batch, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f'Could not build variants for {image}: {e}')
+            result = None
+        if result is not None:
+            self.products_collection.update_one(
+                {'_id': ObjectId(product_id)},
+                {'$set': {f'image_variants.{variant_key(image)}': result}})
+        with batch['lock']:
+            batch['pending'] -= 1
+            batch['updated'] = batch['updated'] or result is not None
+            done = batch['pending'] == 0 and batch['updated']
+        if done and self.on_update:
+            self.on_update(product_id)
+
+    def backfill(self, force=False):
+        """Build variants for every product image that doesn't have them yet"""
+        futures = []
+        for product in self.products_collection.find(
+                {'images.0': {'$exists': True}}, {'images': 1, 'image_variants': 1}):
+            known = product.get('image_variants', {})
+            missing = [img for img in product['images']
+                       if force or variant_key(img) not in known]
+            futures.extend(self.submit(product['_id'], missing))
+        for future in futures:
+            future.exception()  # wait; errors are logged by _record
+        return len(futures)
+
+
+def _srcset(entries):
+    return ', '.join(f"{url_for('static', filename='uploads/' + e['path'])} {e['w']}w"
+                     for e in entries)
+
+
+def product_picture(product, image=None, alt=None, css_class='',
+                    sizes='(max-width: 768px) 50vw, 320px'):
+    """
+    <picture> markup for a product image with AVIF/WebP sources and a
+    srcset on the fallback <img>; plain <img> when no variants exist yet
+    """
+    image = image or product['images'][0]
+    alt = escape(alt if alt is not None else product.get('name', ''))
+    class_attr = f' class="{escape(css_class)}"' if css_class else ''
+    original = url_for('static', filename='uploads/' + image)
+    info = (product.get('image_variants') or {}).get(variant_key(image))
+
+    if not info:
+        return Markup(f'<img src="{original}" alt="{alt}"{class_attr} loading="lazy">')
+
+    sources = ''.join(
+        f'<source type="image/{fmt}" srcset="{_srcset(entries)}" sizes="{sizes}">'
+        for fmt, entries in info['variants'].items() if fmt != info['fallback'])
+    fallback = info['variants'][info['fallback']]
+    default = fallback[min(1, len(fallback) - 1)]
+    return Markup(
+        f'<picture style="display: contents">{sources}'
+        f'<img src="{url_for("static", filename="uploads/" + default["path"])}" '
+        f'srcset="{_srcset(fallback)}" sizes="{sizes}" alt="{alt}"{class_attr} '
+        f'width="{info["width"]}" height="{info["height"]}" loading="lazy" decoding="async">'
+        f'</picture>')
@@ -0,0 +1,75 @@
+# utils/page_cache.py - Rendered-response cache for anonymous catalog pages
+from functools import wraps
+from flask import request, session, make_response
+from utils.http_cache import is_personalized
+
+# Session keys that don't change what a public page looks like
+NEUTRAL_SESSION_KEYS = {'csrf_token'}
+
+
+def is_anonymous_request():
+    """GET/HEAD from a visitor with no login, flashes or other session state"""
+    if request.method not in ('GET', 'HEAD') or is_personalized():
+        return False
+    return not (set(session.keys()) - NEUTRAL_SESSION_KEYS)
+
+
+class PageCache:
+    """
+    Cache the rendered body of public pages for anonymous visitors.
+
+    Entries live in a bounded TTLCache keyed on
+    ('page', endpoint, view args, selected query args, locale), so a
+    product or category write can drop exactly the pages it affects.
+    Responses that set cookies or aren't plain 200s are never stored.
+    """
+
+    def __init__(self, store, locales=('en',)):
+        self.store = store
+        self.locales = list(locales)
+
+    def _key(self, query_args):
+        locale = request.accept_languages.best_match(self.locales) or self.locales[0]
+        return ('page', request.endpoint,
+                tuple(sorted(request.view_args.items())),
+                tuple((arg, request.args.get(arg, '')) for arg in query_args),
+                locale)
+
+    def cached(self, query_args=()):
+        """Decorator caching a view's rendered output per key"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not is_anonymous_request():
+                    return view(*args, **kwargs)
+
+                key = self._key(query_args)
+                hit = self.store.get(key)
+                if hit is not None:
+                    body, mimetype = hit
+                    response = make_response(body)
+                    response.mimetype = mimetype
+                    response.headers['X-Page-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                session_touched = getattr(session, 'modified', False)
+                if (response.status_code == 200 and not response.is_streamed
+                        and 'Set-Cookie' not in response.headers and not session_touched):
+                    self.store.set(key, (response.get_data(), response.mimetype))
+                    response.headers['X-Page-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, endpoint, **view_args):
+        """Drop cached pages of an endpoint (optionally only for given view args)"""
+        wanted = set(view_args.items())
+        self.store.invalidate_matching(
+            lambda key: key[1] == endpoint and wanted <= set(key[2]))
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        return self.store.stats()
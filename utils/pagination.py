@@ -0,0 +1,153 @@
+# utils/pagination.py - Keyset (cursor) pagination over (created_at, _id)
+import json
+import base64
+import binascii
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(doc, field='created_at'):
+    """Turn the sort key of a document into an opaque URL-safe token"""
+    value = doc.get(field)
+    payload = {
+        't': value.isoformat() if isinstance(value, datetime) else None,
+        'i': str(doc['_id'])
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (datetime, ObjectId) for a token, or None if it is invalid"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        value = datetime.fromisoformat(payload['t']) if payload.get('t') else None
+        return value, ObjectId(payload['i'])
+    except (ValueError, KeyError, TypeError, InvalidId, binascii.Error):
+        return None
+
+
+def _keyset_filter(position, field, newer):
+    """Filter for documents strictly after/before a (field, _id) position"""
+    value, oid = position
+    op = '$gt' if newer else '$lt'
+    if value is None:
+        return {field: None, '_id': {op: oid}}
+    return {'$or': [
+        {field: {op: value}},
+        {field: value, '_id': {op: oid}}
+    ]}
+
+
+class Page:
+    """One page of keyset-paginated results"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_page(collection, query=None, per_page=20, after=None, before=None,
+                projection=None, field='created_at', total=None):
+    """
+    Fetch one page of `collection` ordered newest first by (field, _id).
+
+    `after` continues to older documents from a next_cursor token, `before`
+    steps back to newer ones from a prev_cursor token. Backed by a
+    compound (field: -1, _id: -1) index, so every page costs the same no
+    matter how deep it is. `total` is passed through untouched so callers
+    can supply an exact, estimated or no count.
+    """
+    query = dict(query or {})
+    newer_position = decode_cursor(before)
+    position = newer_position or decode_cursor(after)
+    newer = newer_position is not None
+
+    if position:
+        keyset = _keyset_filter(position, field, newer)
+        query = {'$and': [query, keyset]} if query else keyset
+
+    direction = 1 if newer else -1
+    cursor = (collection.find(query, projection)
+              .sort([(field, direction), ('_id', direction)])
+              .limit(per_page + 1))
+    docs = list(cursor)
+
+    more = len(docs) > per_page
+    docs = docs[:per_page]
+    if newer:
+        docs.reverse()
+
+    next_cursor = prev_cursor = None
+    if docs:
+        # Walking back, "more" means newer pages exist; walking forward, older
+        if newer:
+            next_cursor = encode_cursor(docs[-1], field)
+            prev_cursor = encode_cursor(docs[0], field) if more else None
+        else:
+            next_cursor = encode_cursor(docs[-1], field) if more else None
+            prev_cursor = encode_cursor(docs[0], field) if position else None
+
+    return Page(docs, next_cursor=next_cursor, prev_cursor=prev_cursor, total=total)
+
+
+def count_total(collection, query=None, cap=None):
+    """
+    Total for a listing: the cheap metadata estimate when unfiltered,
+    otherwise count_documents, optionally stopping at `cap` matches
+    """
+    if not query:
+        return collection.estimated_document_count()
+    if cap:
+        return collection.count_documents(query, limit=cap)
+    return collection.count_documents(query)
+
+
+def _position(token):
+    """Rank offset from a rank_page cursor, or None if it is invalid"""
+    try:
+        offset = int(token)
+    except (TypeError, ValueError):
+        return None
+    return offset if offset >= 0 else None
+
+
+def rank_page(collection, ranked_ids, per_page=20, after=None, before=None, projection=None):
+    """
+    Fetch one page of search results in rank order.
+
+    `ranked_ids` is the full best-first list of ObjectIds from the search
+    index; cursors are positions in that list, so pages keep the ranking
+    and every match is reachable. Only the page's documents are loaded
+    (one $in query), and ids whose documents have gone are skipped.
+    """
+    end = _position(before)
+    if end is not None:
+        end = min(end, len(ranked_ids))
+        start = max(end - per_page, 0)
+    else:
+        start = min(_position(after) or 0, len(ranked_ids))
+        end = min(start + per_page, len(ranked_ids))
+
+    window = ranked_ids[start:end]
+    found = {doc['_id']: doc for doc in collection.find({'_id': {'$in': window}}, projection)} if window else {}
+    docs = [found[oid] for oid in window if oid in found]
+
+    return Page(docs,
+                next_cursor=str(end) if end < len(ranked_ids) else None,
+                prev_cursor=str(start) if start > 0 else None,
+                total=len(ranked_ids))
@@ -0,0 +1,151 @@
+# utils/passwords.py - bcrypt checks on a bounded pool with load shedding
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+
+LATENCY_SAMPLES = 256
+# bcrypt only uses the first 72 bytes; bcrypt 5 raises instead of truncating
+BCRYPT_MAX_BYTES = 72
+
+
+class LoginOverloaded(Exception):
+    """Raised when a verification is shed instead of queued"""
+
+
+def _secret(password):
+    """Password bytes as bcrypt < 5 used them, so older hashes keep verifying"""
+    return password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+
+
+def hash_rounds(hashed):
+    """Cost factor of a stored hash ("$2b$12$..." -> 12), or None if unparseable"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small dedicated thread pool instead of the request
+    thread. bcrypt releases the GIL while hashing, so the pool bounds how
+    many cores logins can take without blocking other requests.
+
+    At most `workers` hashes run at once and `max_queue` more may wait;
+    anything beyond that raises LoginOverloaded straight away, so a
+    credential-stuffing burst is shed in microseconds instead of piling
+    up behind the CPU. Latency (queue wait + hash) and queue depth are
+    kept for stats().
+    """
+
+    def __init__(self, rounds=12, workers=2, max_queue=16, timeout=10):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+        self.max_depth = 0
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise LoginOverloaded()
+            if self._executor is None or self._pid != os.getpid():
+                # One pool per worker process, created after the fork
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='bcrypt')
+                self._pid = os.getpid()
+            self._in_flight += 1
+            self.max_depth = max(self.max_depth, self._in_flight)
+
+        start = time.perf_counter()
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._done)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise LoginOverloaded()
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+            self.completed += 1
+        return result
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def verify(self, hashed, password):
+        """True if password matches the stored hash; may raise LoginOverloaded"""
+        if not hashed or not password:
+            return False
+        try:
+            return self._submit(bcrypt.checkpw, _secret(password), hashed.encode('utf-8'))
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    def hash(self, password):
+        """New hash at the configured cost factor (also runs on the pool)"""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._submit(bcrypt.hashpw, _secret(password), salt).decode('utf-8')
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def upgrade(self, hashed, password, save):
+        """
+        After a successful verify, rehash at the configured cost factor and
+        call save(new_hash) if the stored hash used a different one. Skipped
+        (and retried on the next login) when the pool is busy.
+        """
+        if not self.needs_rehash(hashed):
+            return False
+        try:
+            new_hash = self.hash(password)
+        except LoginOverloaded:
+            return False
+        save(new_hash)
+        with self._lock:
+            self.rehashed += 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._latencies)
+            in_flight = self._in_flight
+            counters = {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': in_flight,
+                'queue_depth': max(in_flight - self.workers, 0),
+                'max_depth': self.max_depth,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'rehashed': self.rehashed
+            }
+
+        def percentile(p):
+            if not samples:
+                return None
+            return round(samples[min(int(len(samples) * p), len(samples) - 1)] * 1000, 1)
+
+        counters['latency_ms'] = {'p50': percentile(0.5), 'p95': percentile(0.95),
+                                  'max': percentile(1.0)}
+        return counters
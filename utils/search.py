@@ -0,0 +1,317 @@
+# utils/search.py - In-memory product search index (BM25, prefix and typo tolerant)
+import re
+import math
+import threading
+from collections import defaultdict
+
+# Field weights: buyers mostly type part numbers and manufacturers
+FIELD_WEIGHTS = {
+    'part_number': 3.0,
+    'name': 2.0,
+    'manufacturer': 1.5,
+    'machine_type': 1.0,
+    'description': 0.6
+}
+
+PREFIX_MIN = 2
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_SPLIT = re.compile(r'[^0-9a-z]+')
+_ALNUM_BOUNDARY = re.compile(r'[a-z]+|[0-9]+')
+
+
+def normalize(text):
+    """Lower-case and drop every non-alphanumeric character ("HX-200/B" -> "hx200b")"""
+    return _SPLIT.sub('', (text or '').lower())
+
+
+def tokenize(text, part_number=False):
+    """
+    Split text into search terms. Part numbers additionally yield their
+    compact form and letter/digit runs, so "HX-200B" matches "hx200b",
+    "hx 200" and "200b".
+    """
+    text = (text or '').lower()
+    tokens = [t for t in _SPLIT.split(text) if t]
+    if part_number:
+        extra = []
+        compact = normalize(text)
+        if compact:
+            extra.append(compact)
+        for token in tokens:
+            runs = _ALNUM_BOUNDARY.findall(token)
+            if len(runs) > 1:
+                extra.extend(runs)
+        tokens.extend(extra)
+    return tokens
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance, giving up early once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def fuzzy_limit(token):
+    if len(token) >= 8:
+        return 2
+    if len(token) >= 4:
+        return 1
+    return 0
+
+
+class SearchIndex:
+    """
+    Inverted index over the product catalog.
+
+    Postings map term -> {product_id: {field: term frequency}} and are
+    scored with BM25 per field, combined using FIELD_WEIGHTS. Query terms
+    also match vocabulary terms they prefix (via an edge n-gram table) and
+    terms within a small edit distance. Documents are added, replaced and
+    removed incrementally. For changes made by other workers refresh()
+    rebuilds from Mongo on a background thread and swaps the new index in,
+    so queries keep being served from the previous one meanwhile; only the
+    very first query in a process builds synchronously.
+
+    `version` is what version_func() returned when the current snapshot
+    started loading, for ETags; it is None after an in-place change until
+    the next rebuild.
+    """
+
+    def __init__(self, products_collection, version_func=None):
+        self.products_collection = products_collection
+        self.version_func = version_func
+        self.version = None
+        self._lock = threading.RLock()
+        self._built = False
+        self._rebuilding = False
+        self._dirty = False
+        self._reset()
+
+    def _reset(self):
+        self._postings = defaultdict(dict)
+        self._prefixes = defaultdict(set)
+        self._doc_terms = {}
+        self._field_lengths = {}
+        self._total_lengths = defaultdict(int)
+        self._categories = {}
+
+    # ----- building -----
+    def _analyze(self, product):
+        fields = {}
+        for field in FIELD_WEIGHTS:
+            tokens = tokenize(product.get(field), part_number=(field == 'part_number'))
+            if tokens:
+                fields[field] = tokens
+        return fields
+
+    def _add(self, doc_id, product):
+        fields = self._analyze(product)
+        self._categories[doc_id] = product.get('category_id')
+        self._doc_terms[doc_id] = set()
+        self._field_lengths[doc_id] = {}
+        for field, tokens in fields.items():
+            self._field_lengths[doc_id][field] = len(tokens)
+            self._total_lengths[field] += len(tokens)
+            for token in tokens:
+                freqs = self._postings[token].setdefault(doc_id, {})
+                freqs[field] = freqs.get(field, 0) + 1
+                if token not in self._doc_terms[doc_id]:
+                    self._doc_terms[doc_id].add(token)
+                    for n in range(PREFIX_MIN, len(token)):
+                        self._prefixes[token[:n]].add(token)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._categories.pop(doc_id, None)
+        for field, length in self._field_lengths.pop(doc_id, {}).items():
+            self._total_lengths[field] -= length
+        for token in terms:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                for n in range(PREFIX_MIN, len(token)):
+                    bucket = self._prefixes.get(token[:n])
+                    if bucket:
+                        bucket.discard(token)
+                        if not bucket:
+                            del self._prefixes[token[:n]]
+
+    def rebuild(self):
+        """Load the whole catalog into a fresh index and swap it in"""
+        version = self.version_func() if self.version_func else None
+        projection = dict.fromkeys(FIELD_WEIGHTS, 1)
+        projection['category_id'] = 1
+        fresh = SearchIndex(self.products_collection)
+        for product in self.products_collection.find({}, projection):
+            fresh._add(str(product['_id']), product)
+        with self._lock:
+            self._postings, self._prefixes = fresh._postings, fresh._prefixes
+            self._doc_terms, self._field_lengths = fresh._doc_terms, fresh._field_lengths
+            self._total_lengths, self._categories = fresh._total_lengths, fresh._categories
+            self._built = True
+            self.version = version
+
+    def _ensure_built(self):
+        if not self._built:
+            self.rebuild()
+
+    def upsert(self, product):
+        """Index a new or edited product (must include _id)"""
+        with self._lock:
+            if not self._built:
+                return  # the first build will pick it up
+            doc_id = str(product['_id'])
+            self._remove(doc_id)
+            self._add(doc_id, product)
+            self.version = None
+            # A rebuild in flight may have read the catalog before this write
+            self._dirty = self._dirty or self._rebuilding
+
+    def remove(self, product_id):
+        with self._lock:
+            if self._built:
+                self._remove(str(product_id))
+                self.version = None
+                self._dirty = self._dirty or self._rebuilding
+
+    def refresh(self):
+        """Schedule a background rebuild (coalesces bursts of writes)"""
+        with self._lock:
+            if not self._built:
+                return  # nothing served yet; the first query builds
+            self._dirty = True
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_loop, name='search-index-refresh', daemon=True).start()
+
+    def _rebuild_loop(self):
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    # Same critical section as refresh()'s check, so a refresh
+                    # from here on starts a new loop instead of being dropped
+                    self._rebuilding = False
+                    return
+                self._dirty = False
+            try:
+                self.rebuild()
+            except BaseException:
+                with self._lock:
+                    self._rebuilding = False
+                raise
+
+    # ----- querying -----
+    def _expand(self, token):
+        """Vocabulary terms a query token matches, with their match weight"""
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if len(token) >= PREFIX_MIN:
+            for term in self._prefixes.get(token, ()):
+                matches.setdefault(term, PREFIX_WEIGHT)
+        limit = fuzzy_limit(token)
+        if not matches and limit:
+            for term in self._postings:
+                if term[0] == token[0] and edit_distance(token, term, limit) <= limit:
+                    matches.setdefault(term, FUZZY_WEIGHT)
+        return matches
+
+    def _bm25(self, term, doc_count):
+        postings = self._postings[term]
+        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+        scores = {}
+        for doc_id, freqs in postings.items():
+            lengths = self._field_lengths[doc_id]
+            score = 0.0
+            for field, tf in freqs.items():
+                avg = self._total_lengths[field] / doc_count or 1
+                norm = tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[field] / avg))
+                score += FIELD_WEIGHTS[field] * norm
+            scores[doc_id] = idf * score
+        return scores
+
+    def search(self, query, limit=50, category_id=None):
+        """Return [(product_id, score), ...] best first (limit=None for every match)"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            self._ensure_built()
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return []
+
+            totals = defaultdict(float)
+            matched = defaultdict(int)
+            for token in tokens:
+                token_scores = {}
+                for term, weight in self._expand(token).items():
+                    for doc_id, score in self._bm25(term, doc_count).items():
+                        token_scores[doc_id] = max(token_scores.get(doc_id, 0), weight * score)
+                for doc_id, score in token_scores.items():
+                    if category_id and self._categories.get(doc_id) != category_id:
+                        continue
+                    totals[doc_id] += score
+                    matched[doc_id] += 1
+
+        # Prefer documents matching every query term; fall back to any term
+        results = [d for d in totals if matched[d] == len(tokens)] or list(totals)
+        results.sort(key=lambda d: totals[d], reverse=True)
+        if limit is not None:
+            results = results[:limit]
+        return [(doc_id, totals[doc_id]) for doc_id in results]
+
+
+# ----- normalized shadow fields for indexed admin search -----
+def shadow_fields(product):
+    """
+    Lower-cased, punctuation-free search terms for the name and part
+    number, stored on the product so admin search can use anchored-prefix
+    index scans
+    """
+    name = product.get('name') or ''
+    part_number = product.get('part_number') or ''
+    terms = {normalize(name), normalize(part_number)}
+    terms.update(normalize(word) for word in name.split())
+    terms.update(tokenize(part_number, part_number=True))
+    return {'search_terms': sorted(t for t in terms if t)}
+
+
+def admin_search_filter(text, fulltext=False):
+    """
+    Mongo filter for the admin product search box. Matches the start of
+    the normalized name, any name word or the part number via the
+    multikey search_terms index; fulltext=True opts into the $text index
+    over name and description instead.
+    """
+    if fulltext:
+        return {'$text': {'$search': text}}
+    prefix = normalize(text)
+    if not prefix:
+        return {}
+    return {'search_terms': {'$regex': '^' + re.escape(prefix)}}
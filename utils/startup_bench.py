@@ -0,0 +1,80 @@
+# utils/startup_bench.py - Cold-start benchmark for importing the app
+#
+#   python -m utils.startup_bench [--runs 5] [--module app] [--top 10]
+#
+# Each run imports the module in a fresh interpreter with MONGODB_URI
+# pointed at an unroutable address, so an import that still touches the
+# database shows up as a multi-second stall or a failed run.
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+UNREACHABLE_URI = 'mongodb://192.0.2.1:27017/?serverSelectionTimeoutMS=2000'
+
+PROBE = (
+    'import time\n'
+    't = time.perf_counter()\n'
+    'import {module} as m\n'
+    'elapsed = time.perf_counter() - t\n'
+    'mongo = getattr(m, "mongo", None)\n'
+    'print(elapsed, bool(mongo and mongo.connected))\n'
+)
+
+
+def run_once(module, importtime=False):
+    """Import module in a subprocess; returns (seconds, connected, importtime lines)"""
+    env = dict(os.environ, MONGODB_URI=UNREACHABLE_URI)
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', PROBE.format(module=module)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'import {module} failed:\n{proc.stderr.strip()}')
+    elapsed, connected = proc.stdout.split()[-2:]
+    return float(elapsed), connected == 'True', proc.stderr.splitlines()
+
+
+def slowest_imports(lines, top):
+    """Parse `-X importtime` output into the top cumulative import times (ms)"""
+    rows = []
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative) / 1000, name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold import time of the app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    timings = []
+    connected = False
+    for _ in range(args.runs):
+        elapsed, opened, _ = run_once(args.module)
+        timings.append(elapsed * 1000)
+        connected = connected or opened
+
+    print(f'import {args.module}: {args.runs} runs, '
+          f'min {min(timings):.1f} ms, median {statistics.median(timings):.1f} ms, '
+          f'max {max(timings):.1f} ms')
+    print(f'MongoClient created during import: {"yes" if connected else "no"}')
+
+    if args.top:
+        _, _, lines = run_once(args.module, importtime=True)
+        print('Slowest imports (cumulative):')
+        for ms, name in slowest_imports(lines, args.top):
+            print(f'  {ms:8.1f} ms  {name}')
+    return 1 if connected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
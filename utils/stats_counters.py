@@ -0,0 +1,174 @@
+# utils/stats_counters.py - Materialized dashboard counters
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_ID = 'counters'
+ENQUIRY_STATUSES = ('new', 'contacted', 'quoted', 'closed')
+COUNTER_FIELDS = ('total_products', 'total_categories', 'total_enquiries',
+                  'enquiries_by_status', 'stock_low')
+
+
+class StatsCounters:
+    """
+    Dashboard statistics kept in a single counters document.
+
+    Write paths adjust it with atomic $inc so reads are one find_one
+    instead of a count_documents per figure. A periodic reconciliation
+    recomputes the true values and overwrites any drift.
+
+    Every $inc also bumps the document's `version`, so a reconciliation
+    only replaces counters nobody changed while it was counting.
+    on_reconcile() runs after a reconciliation that changed the figures.
+    """
+
+    def __init__(self, stats_collection, products_collection,
+                 categories_collection, enquiries_collection, on_reconcile=None):
+        self.stats_collection = stats_collection
+        self.products_collection = products_collection
+        self.categories_collection = categories_collection
+        self.enquiries_collection = enquiries_collection
+        self.on_reconcile = on_reconcile
+        self._reconciler_pid = None
+
+    # ----- write paths -----
+    def incr(self, **deltas):
+        """Apply counter deltas, e.g. incr(total_products=1, stock_low=-1)"""
+        deltas = {k.replace('__', '.'): v for k, v in deltas.items() if v}
+        if not deltas:
+            return
+        deltas['version'] = 1
+        try:
+            self.stats_collection.update_one({'_id': COUNTERS_ID}, {'$inc': deltas}, upsert=True)
+        except PyMongoError as e:
+            # Reconciliation will correct the counters later
+            logger.error(f'Failed to update stats counters: {e}')
+
+    def product_added(self, product):
+        self.incr(total_products=1,
+                  stock_low=1 if product.get('stock_status') == 'limited' else 0)
+
+    def product_removed(self, product):
+        self.incr(total_products=-1,
+                  stock_low=-1 if product.get('stock_status') == 'limited' else 0)
+
+    def product_changed(self, old, new):
+        was_low = old.get('stock_status') == 'limited'
+        is_low = new.get('stock_status') == 'limited'
+        self.incr(stock_low=int(is_low) - int(was_low))
+
+    def category_added(self):
+        self.incr(total_categories=1)
+
+    def category_removed(self):
+        self.incr(total_categories=-1)
+
+    def enquiry_added(self, status='new'):
+        self.incr(total_enquiries=1, **{f'enquiries_by_status__{status}': 1})
+
+    def enquiry_status_changed(self, old_status, new_status):
+        if old_status == new_status:
+            return
+        deltas = {f'enquiries_by_status__{new_status}': 1}
+        if old_status:
+            deltas[f'enquiries_by_status__{old_status}'] = -1
+        self.incr(**deltas)
+
+    # ----- reads -----
+    def read(self):
+        """Return the flattened counters, seeding them on first use"""
+        doc = self.stats_collection.find_one({'_id': COUNTERS_ID})
+        if not doc or 'reconciled_at' not in doc:
+            doc = self.reconcile()
+        by_status = doc.get('enquiries_by_status', {})
+        return {
+            'total_products': doc.get('total_products', 0),
+            'total_categories': doc.get('total_categories', 0),
+            'total_enquiries': doc.get('total_enquiries', 0),
+            'new_enquiries': by_status.get('new', 0),
+            'enquiries_by_status': {s: by_status.get(s, 0) for s in ENQUIRY_STATUSES},
+            'stock_low': doc.get('stock_low', 0)
+        }
+
+    # ----- reconciliation -----
+    def compute(self):
+        """Recompute every counter from the source collections"""
+        by_status = {s: 0 for s in ENQUIRY_STATUSES}
+        for row in self.enquiries_collection.aggregate([
+                {'$group': {'_id': '$status', 'count': {'$sum': 1}}}]):
+            if row['_id']:
+                by_status[row['_id']] = row['count']
+        return {
+            'total_products': self.products_collection.count_documents({}),
+            'total_categories': self.categories_collection.count_documents({}),
+            'total_enquiries': sum(by_status.values()),
+            'enquiries_by_status': by_status,
+            'stock_low': self.products_collection.count_documents({'stock_status': 'limited'})
+        }
+
+    def reconcile(self, attempts=3):
+        """Overwrite the counters with true values, logging any drift"""
+        for _ in range(attempts):
+            previous = self.stats_collection.find_one({'_id': COUNTERS_ID})
+            actual = self.compute()
+            actual['reconciled_at'] = datetime.utcnow()
+            actual['version'] = (previous or {}).get('version', 0)
+            try:
+                if previous is None:
+                    self.stats_collection.insert_one(dict(actual, _id=COUNTERS_ID))
+                # Lose to any $inc applied since the read and count again
+                elif not self.stats_collection.replace_one(
+                        {'_id': COUNTERS_ID, 'version': previous.get('version')},
+                        actual).matched_count:
+                    continue
+            except DuplicateKeyError:
+                continue
+            break
+        else:
+            logger.warning('Stats counters kept changing during reconciliation; '
+                           'leaving them for the next run')
+            return actual
+
+        changed = previous is None or any(previous.get(k) != actual[k] for k in COUNTER_FIELDS)
+        if previous:
+            # Keys only ever $inc'd into a seed document have no previous value to drift from
+            drift = {k: actual[k] for k in ('total_products', 'total_categories',
+                                            'total_enquiries', 'stock_low')
+                     if k in previous and previous[k] != actual[k]}
+            if drift:
+                logger.warning(f'Stats counters drifted, corrected to {drift}')
+        if changed and self.on_reconcile:
+            self.on_reconcile()
+        return actual
+
+    def try_reconcile(self, interval):
+        """Reconcile if no worker has done so within `interval` seconds"""
+        cutoff = datetime.utcnow() - timedelta(seconds=interval)
+        try:
+            # Claim the run atomically so only one worker reconciles
+            claimed = self.stats_collection.find_one_and_update(
+                {'_id': COUNTERS_ID, 'reconciled_at': {'$lt': cutoff}},
+                {'$set': {'reconciled_at': datetime.utcnow()}}
+            )
+            if claimed:
+                self.reconcile()
+        except PyMongoError as e:
+            logger.error(f'Stats reconciliation failed: {e}')
+
+    def ensure_reconciler(self, interval=3600):
+        """Start the periodic reconciliation thread once per worker process"""
+        if not interval or self._reconciler_pid == os.getpid():
+            return
+        self._reconciler_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.try_reconcile(interval)
+
+        threading.Thread(target=loop, name='stats-reconciler', daemon=True).start()